@@ -1,12 +1,39 @@
+import os
+import time
 import pygame
-import csv
 from scripts.sound import SoundManager
 from scripts.player import Player
-from scripts.bullet import Projectile
+from scripts.bullet import ProjectilePool
 from scripts.coins import Coin
 from scripts.Camera import Camera
-from scripts.enemy import Enemy
-
+from scripts.enemy import Enemy, EnemyManager
+from scripts.collision import CollisionGrid
+from scripts.sight import LineOfSight
+from scripts.chunks import TileChunkCache
+from scripts.assets import assets
+from scripts.loader import loader
+from scripts.atlas import Atlas
+from scripts import tilemap
+from scripts.profiler import FrameProfiler, DebugChannel
+from scripts.dirty import DirtyRenderer
+from scripts.ui import Label, text_cache
+from scripts.spatial import SpatialHash
+from scripts.replay import InputRecorder
+from scripts.capture import FrameCapture
+from scripts.timestep import FixedTimestep
+from scripts.snapshot import Snapshotter, SnapshotRing
+
+SOLID_TILES = frozenset(range(1, 17))
+TILE_IDS = range(1, 68)
+TILE_SIZE = 40
+
+
+def gameplay_assets():
+    # (path, size) of every sprite the level draws; the atlas bundle bakes these
+    images = [("coin.png", (25, 25)), ("projectile.png", (9, 9))]
+    images.extend((f"Tile/{i}.png", (TILE_SIZE, TILE_SIZE)) for i in TILE_IDS)
+    images.extend((path, None) for path in Player.asset_paths() + Enemy.asset_paths())
+    return images
 
 
 class Button:
@@ -19,7 +46,7 @@ class Button:
 
     def draw(self, screen):
         pygame.draw.rect(screen, self.color, self.rect)
-        text_surface = self.font.render(self.text, True, self.text_color)
+        text_surface = text_cache.render(self.font, self.text, self.text_color)
         text_rect = text_surface.get_rect(center=self.rect.center)
         screen.blit(text_surface, text_rect)
 
@@ -28,20 +55,67 @@ class Button:
 
 
 class Game:
-    def __init__(self, width=800, height=600, start_x=None, end_x=None):
+    def __init__(self, width=800, height=600, start_x=None, end_x=None, headless=False, input_source=None,
+                 map_file="map.csv", profile=False, profile_out=None, debug_position=False,
+                 render_mode='full', bundle="assets.dab", audio_frequency=44100, audio_buffer=512,
+                 audio_channels=8, activity_margin=200, record_to=None, physics_rate=60, render_fps=60,
+                 rewind_ticks=0, render_scale=1, smooth_scaling=False):
+        started = time.perf_counter()
+        self.headless = headless
+        self.input_source = input_source
+        if headless:
+            # Has to happen before pygame.init() so SDL picks the dummy drivers
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            os.environ['SDL_AUDIODRIVER'] = 'dummy'
+        # Smaller buffers lower sound latency at the cost of more mixing calls
+        pygame.mixer.pre_init(frequency=audio_frequency, buffer=audio_buffer)
         pygame.init()
         self.width = width
         self.height = height
         pygame.display.set_caption('Dunes Dash')
         self.screen = pygame.display.set_mode((self.width, self.height))
         self.clock = pygame.time.Clock()
+        # Physics always advances in steps of 1 / physics_rate; rendering runs
+        # at up to render_fps and interpolates between the last two steps
+        self.timestep = FixedTimestep(physics_rate)
+        self.render_fps = render_fps
+        self.menu_fps = 30
+        self.menu_redraw_ms = 500
         self.running = True
-        self.in_menu = True
-        self.sound_manager = SoundManager()
-        self.sound_manager.play_music('menu')
-
-        self.tile_size = 40
-        self.load_map("map.csv")
+        self.in_menu = not headless
+
+        # Sprites come from the atlas bundle when one has been built
+        if bundle and os.path.exists(bundle):
+            assets.use_bundle(Atlas(bundle))
+        # Decode everything else in the background; the menu only waits for
+        # its own background, and the level picks up the rest as it is built
+        assets.prefetch(["menu.png"])
+        assets.prefetch(["bg.png"] + [path for path, _ in gameplay_assets()])
+        self.sound_manager = SoundManager(audio_channels, audio_frequency, audio_buffer)
+        assets.use_scale(1)
+        self.bgmenu = assets.image("menu.png", (width, height), alpha=False)
+        self.play_button = Button(300, 250, 200, 50, "Play", (0, 255, 0), (0, 0, 0))
+        self.exit_button = Button(300, 350, 200, 50, "Exit", (255, 0, 0), (0, 0, 0))
+        # Startup timings in milliseconds, from entering __init__
+        self.startup = {}
+        if not headless:
+            self.render_menu()
+            self.startup['first_frame_ms'] = (time.perf_counter() - started) * 1000
+            self.sound_manager.play_music('menu')
+
+        # The level is drawn into a framebuffer render_scale times the window
+        # size and scaled up in one step; snapped so tiles stay whole pixels
+        self.render_scale = round(TILE_SIZE * render_scale) / TILE_SIZE
+        self.smooth_scaling = smooth_scaling
+        self.canvas = None
+        if self.render_scale != 1:
+            self.canvas = pygame.Surface((round(width * self.render_scale), round(height * self.render_scale))).convert()
+        # Everything the level loads from here on is pre-scaled to the framebuffer
+        assets.use_scale(self.render_scale)
+
+        self.tile_size = TILE_SIZE
+        self.map_file = map_file
+        self.load_map(map_file)
         # Set default start_x if not provided
         self.start_x = start_x if start_x is not None else self.tile_size
         
@@ -51,28 +125,63 @@ class Game:
         self.player = Player((self.start_x, 300), 36, self.sound_manager)
         self.set_map_boundaries()
         self.camera = Camera(self.width, self.height, len(self.map))
+        self.camera.zoom = self.render_scale
         self.movement = [False, False]
+        # Enemies further than this many pixels outside the view sleep,
+        # and projectiles that far out are dropped; None simulates everything
+        self.activity_margin = activity_margin
 
         self.load_tiles()
-        self.bg = pygame.image.load("bg.png").convert()
-        self.bg = pygame.transform.scale(self.bg, (width, height))
-        
-        self.bgmenu = pygame.image.load("menu.png").convert()
-        self.bgmenu = pygame.transform.scale(self.bgmenu, (width, height))
-
-        self.coins = []
-        self.load_coins()
-
-        self.enemies = []
-        self.load_enemies()
+        self.tile_cache = TileChunkCache(self.map_layers, assets.scaled_size((self.tile_size,))[0],
+                                         (self.tiles, self.nottiles))
+        self.bg = assets.image("bg.png", (width, height), alpha=False)
+
+        # Coins are bucketed by position, so pickups and drawing only look
+        # at the ones near the player or the view
+        self.coins = SpatialHash()
+
+        self.projectiles = ProjectilePool(bounds=pygame.Rect(
+            0, 0, self.collision_grid.cols * self.tile_size, self.collision_grid.rows * self.tile_size))
+        self.enemy_manager = EnemyManager(self.player, self.projectiles)
+        self.enemy_manager.sight = LineOfSight(self.collision_grid)
+        # Kept in sync by the manager as enemies die
+        self.enemies = self.enemy_manager.enemies
+        # save_state()/load_state() snapshot the simulation; with rewind_ticks
+        # the last that many ticks are kept so rewind() can step back
+        self.snapshotter = Snapshotter(self)
+        self.history = SnapshotRing(rewind_ticks) if rewind_ticks else None
+        self.load_objects()
 
         self.font = pygame.font.Font('sofachrome-rg.otf', 21)
+        self.coin_label = Label(self.font, "Coins: {}", (255, 255, 0), (10, 10))
+        self.health_label = Label(self.font, "Health: {}", (255, 0, 0), (10, 50))
+
+        # F3 toggles the overlay; the samples are written to profile_out on exit
+        self.profiler = FrameProfiler(enabled=profile or profile_out is not None)
+        self.profile_out = profile_out
+        self.debug_font = pygame.font.Font(None, 20)
+        self.position_log = DebugChannel('player', enabled=debug_position)
+
+        # 'dirty' only repaints and presents the screen regions that changed
+        if render_mode not in ('full', 'dirty'):
+            raise ValueError(f"unknown render mode: {render_mode}")
+        if render_mode == 'dirty' and self.canvas is not None:
+            raise ValueError("the dirty render mode draws at full resolution only")
+        self.dirty_renderer = DirtyRenderer(self) if render_mode == 'dirty' else None
+
+        # Every tick's input is recorded and written to record_to on exit
+        self.record_to = record_to
+        self.recorder = InputRecorder(self) if record_to else None
+        self.capture = None
+
+        self.startup['ready_ms'] = (time.perf_counter() - started) * 1000
+        if self.profiler.enabled:
+            print("startup: " + ", ".join(f"{name} {ms:.1f} ms" for name, ms in self.startup.items()))
         
-        self.play_button = Button(300, 250, 200, 50, "Play", (0, 255, 0), (0, 0, 0))
-        self.exit_button = Button(300, 350, 200, 50, "Exit", (255, 0, 0), (0, 0, 0))
-        
-    def handle_menu_events(self):
-        for event in pygame.event.get():
+    def handle_menu_events(self, events=None):
+        if events is None:
+            events = pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
             if event.type == pygame.MOUSEBUTTONDOWN:
@@ -90,65 +199,72 @@ class Game:
         self.exit_button.draw(self.screen)
         pygame.display.flip()
     
-    def load_coins(self):
-        self.coins = [
-            Coin((300, 444), sound_manager=self.sound_manager),
-            Coin((600, 484), sound_manager=self.sound_manager),
-            Coin((682, 324), sound_manager=self.sound_manager),
-            Coin((214, 324), sound_manager=self.sound_manager),
-            Coin((1070, 284), sound_manager=self.sound_manager)
-        ]
-
-    def load_enemies(self):
-        self.enemies = [
-            Enemy((400, 444), self.player, sound_manager=self.sound_manager),
-            Enemy((700, 484), self.player, sound_manager=self.sound_manager),
-            Enemy((426, 284), self.player, sound_manager=self.sound_manager),
-            Enemy((1220, 364), self.player, sound_manager=self.sound_manager)
-            
-        ]
+    def load_objects(self):
+        # Coins and enemies come from the level's object layer
+        for kind, x, y in tilemap.load_objects(self.map_file):
+            self.spawn(kind, (x, y))
+
+    def spawn(self, kind, pos):
+        if kind == 'coin':
+            coin = Coin(pos, sound_manager=self.sound_manager)
+            self.coins.add(coin, coin.rect)
+            self.snapshotter.add_coin(coin)
+            return coin
+        if kind == 'enemy':
+            enemy = Enemy(pos, self.player, sound_manager=self.sound_manager, manager=self.enemy_manager)
+            self.snapshotter.add_enemy(enemy)
+            return enemy
+        raise ValueError(f"unknown object kind: {kind}")
+
+    def coins_in(self, region):
+        if region is None:
+            return list(self.coins)
+        return self.coins.query(region)
 
     def get_coins(self):
-        coins_to_remove = []
-        for coin in self.coins:
+        # Only the coins in the player's cells are tested
+        for coin in self.coins.query(self.player.rect()):
             if coin.collect(self.player):
-                coins_to_remove.append(coin)
+                self.coins.remove(coin)
                 self.player.coins += 1
-        for coin in coins_to_remove:
-            self.coins.remove(coin)
 
     def load_tiles(self):
         self.tiles = {}
         self.nottiles = {}
         for i in range(1, 17):
             try:
-                tile_image = pygame.image.load(f"Tile/{i}.png").convert_alpha()
-                tile_image = pygame.transform.scale(tile_image, (self.tile_size, self.tile_size))
-                self.tiles[str(i)] = tile_image
+                self.tiles[i] = assets.image(f"Tile/{i}.png", (self.tile_size, self.tile_size))
             except pygame.error:
                 print(f"Warning: Could not load tile image {i}.png")
         
         for i in range(17, 68):
             try:
-                tile_image = pygame.image.load(f"Tile/{i}.png").convert_alpha()
-                tile_image = pygame.transform.scale(tile_image, (self.tile_size, self.tile_size))
-                self.nottiles[str(i)] = tile_image
+                self.nottiles[i] = assets.image(f"Tile/{i}.png", (self.tile_size, self.tile_size))
             except pygame.error:
                 print(f"Warning: Could not load tile image {i}.png")
 
     def load_map(self, filename):
-        self.map = []
-        with open(filename, 'r') as file:
-            reader = csv.reader(file)
-            for row in reader:
-                self.map.append(row)
+        # Layer 0 is the playfield; extra layers are only drawn
+        self.map_layers = tilemap.load(filename)
+        self.map = self.map_layers[0]
+        self.collision_grid = CollisionGrid(self.map, self.tile_size, SOLID_TILES)
     
+    def set_tile(self, x, y, tile):
+        solid = tile in SOLID_TILES
+        self.map[y, x] = tile
+        if self.collision_grid.is_solid(x, y) != solid:
+            self.collision_grid.set_solid(x, y, solid)
+            self.enemy_manager.sight.clear()
+        self.tile_cache.invalidate(x, y)
+
     def set_map_boundaries(self):
         self.player.min_x = self.start_x
         self.player.max_x = self.end_x
 
-    def handle_events(self):
-        for event in pygame.event.get():
+    def handle_events(self, events=None):
+        if events is None:
+            events = pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
             if event.type == pygame.KEYDOWN:
@@ -162,6 +278,8 @@ class Game:
                     self.player.jump()
                 if event.key == pygame.K_SPACE:
                     self.player.attack(self.enemies)
+                if event.key == pygame.K_F3:
+                    self.profiler.overlay = not self.profiler.overlay
             if event.type == pygame.KEYUP:
                 if event.key == pygame.K_LEFT:
                     self.movement[0] = False
@@ -171,110 +289,274 @@ class Game:
                     self.player.duck(False)
 
     def update(self, dt):
+        if self.history is not None:
+            self.history.push(self.save_state())
         self.player.update(dt)
-        print(self.player.pos)
+        self.position_log.log(self.player.pos)
         self.player.player_mov(
             (self.movement[1] - self.movement[0], 0), 
-            self.get_platforms(), 
+            self.collision_grid, 
             dt
         )
         # Update camera only if player is within the scrollable range
         if self.player.pos[0] > self.width // 2 and self.player.pos[0] < self.end_x - self.width // 2:
-            self.camera.update(self.player)
+            self.camera.update(self.player, dt)
+        self.profiler.lap('player')
+
         self.get_coins()
+        self.profiler.lap('coins')
+
+        # Update the enemies near the view in one vectorized step; finished ones are removed
+        region = self.active_region()
+        self.enemy_manager.update(dt, region)
 
-        # Update enemies
-        for enemy in self.enemies[:]:
-            enemy.update(dt)
-            for projectile in enemy.projectiles[:]:
-                if projectile.rect().colliderect(self.player.rect()):
-                    enemy.projectiles.remove(projectile)
-                    self.player.take_damage()
-            if enemy.death_animation_complete:
-                self.enemies.remove(enemy)
+        # Move, cull and hit-test every projectile in one pass
+        if self.projectiles.update(dt, self.player.rect(), region, self.collision_grid):
+            self.player.take_damage()
+        self.profiler.lap('enemies')
 
         # Check for game over
         if self.player.health <= 0:
             self.game_over()
 
-    def render(self):
-        self.screen.fill((0, 0, 0))
-
-        # Draw background
-        bg_scroll = [x % self.bg.get_width() for x in self.camera.scroll]
-        self.screen.blit(self.bg, (-bg_scroll[0], 0))
-        self.screen.blit(self.bg, (-bg_scroll[0] + self.bg.get_width(), 0))
-
-        # Draw tiles
-        for y, row in enumerate(self.map):
-            for x, tile in enumerate(row):
-                if tile != '0' and tile in self.tiles:
-                    tile_x = x * self.tile_size - self.camera.scroll[0]
-                    tile_y = y * self.tile_size - self.camera.scroll[1]
-                    if -self.tile_size <= tile_x < self.width and -self.tile_size <= tile_y < self.height:
-                        self.screen.blit(self.tiles[tile], (tile_x, tile_y))
-        
-        for y, row in enumerate(self.map):
-            for x, tile in enumerate(row):
-                if tile != '0' and tile in self.nottiles:
-                    tile_x = x * self.tile_size - self.camera.scroll[0]
-                    tile_y = y * self.tile_size - self.camera.scroll[1]
-                    if -self.tile_size <= tile_x < self.width and -self.tile_size <= tile_y < self.height:
-                        self.screen.blit(self.nottiles[tile], (tile_x, tile_y))
-        
-        # Draw coins
-        for coin in self.coins:
-            coin.render(self.screen, self.camera)
-
-        # Draw enemies
-        for enemy in self.enemies:
-            
-            enemy.render(self.screen, self.camera)
-
-        # Draw player
+    def enable_capture(self, obs_size=None, grayscale=False):
+        # Later frames render into an array-backed offscreen surface instead
+        # of the window; read them from capture.pixels or capture.observe()
+        self.capture = FrameCapture(self.width, self.height, obs_size, grayscale)
+        self.screen = self.capture.surface
+        if self.dirty_renderer is not None:
+            self.dirty_renderer.invalidate()
+        return self.capture
+
+    def save_state(self):
+        return self.snapshotter.save()
+
+    def load_state(self, data):
+        self.snapshotter.restore(data)
+        if self.dirty_renderer is not None:
+            self.dirty_renderer.invalidate()
+
+    def rewind(self, ticks=1):
+        # Goes back `ticks` updates, at most as far as the history reaches;
+        # without rewind_ticks there is no history and nothing happens
+        if self.history is None:
+            return 0
+        ticks = min(ticks, len(self.history))
+        if ticks:
+            self.load_state(self.history.rewind(ticks))
+        return ticks
+
+    def active_region(self):
+        if self.activity_margin is None:
+            return None
+        return self.camera.view_rect(self.activity_margin)
+
+    def save_positions(self):
+        # The state interpolate() blends from; call before each physics step
+        self.player.prev_pos = list(self.player.pos)
+        self.camera.prev_scroll = list(self.camera.scroll)
+
+    def interpolate(self, alpha):
+        # Moves the player, camera and projectiles to where they were `alpha`
+        # of the way through the last step; returns the state to restore
+        saved = (self.player.pos, self.camera.scroll, self.projectiles.pos)
+
+        def blend(prev, current):
+            return [a + (b - a) * alpha for a, b in zip(prev, current)]
+
+        self.player.pos = blend(self.player.prev_pos, self.player.pos)
+        # Whole pixels keep the dirty renderer's scroll shift exact
+        self.camera.scroll = [round(x) for x in blend(self.camera.prev_scroll, self.camera.scroll)]
+        pool = self.projectiles
+        pool.pos = pool.prev + (pool.pos - pool.prev) * alpha
+        return saved
+
+    def restore_positions(self, saved):
+        self.player.pos, self.camera.scroll, self.projectiles.pos = saved
+
+    def draw_static(self):
+        # Background and tiles; both honour the screen's clip rect
+        target = self.world_surface()
+        scroll = [x * self.camera.zoom for x in self.camera.scroll]
+        bg_scroll = [x % self.bg.get_width() for x in scroll]
+        target.blit(self.bg, (-bg_scroll[0], 0))
+        target.blit(self.bg, (-bg_scroll[0] + self.bg.get_width(), 0))
+        self.tile_cache.render(target, scroll)
+
+    def draw_entities(self):
+        # Returns the screen rects drawn
+        target = self.world_surface()
+        view = self.camera.view_rect()
+        rects = [coin.render(target, self.camera) for coin in self.coins_in(view)]
+        rects.extend(self.enemy_manager.render(target, self.camera, view))
+        rects.extend(self.projectiles.render(target, self.camera))
         player_pos = self.camera.apply(self.player)
-        self.screen.blit(self.player.get_current_sprite(), player_pos)
-
-        # Render UI
-        coin_text = self.font.render(f"Coins: {self.player.coins}", True, (255, 255, 0))
-        health_text = self.font.render(f"Health: {self.player.health}", True, (255, 0, 0))
-        self.screen.blit(coin_text, (10, 10))
-        self.screen.blit(health_text, (10, 50))
+        rects.append(target.blit(self.player.get_current_sprite(), player_pos))
+        return rects
+
+    def world_surface(self):
+        # Where the level is drawn; the HUD always goes straight to the screen
+        return self.screen if self.canvas is None else self.canvas
+
+    def present(self):
+        # Scales the framebuffer up to the screen in a single pass
+        scale = pygame.transform.smoothscale if self.smooth_scaling else pygame.transform.scale
+        scale(self.canvas, self.screen.get_size(), self.screen)
+
+    def draw_ui(self):
+        # Returns the screen rects drawn
+        rects = [
+            self.coin_label.draw(self.screen, self.player.coins),
+            self.health_label.draw(self.screen, self.player.health),
+        ]
+        rects.extend(self.profiler.draw_overlay(self.screen, self.debug_font))
+        return rects
+
+    def render(self, alpha=None):
+        # Draws the state `alpha` of the way through the last step, or the
+        # current one; either way the camera is drawn on whole pixels
+        if alpha is not None:
+            saved = self.interpolate(alpha)
+        else:
+            saved = (self.player.pos, self.camera.scroll, self.projectiles.pos)
+            self.camera.scroll = [round(x) for x in self.camera.scroll]
+        self.draw_frame()
+        self.restore_positions(saved)
+
+    def draw_frame(self):
+        if self.dirty_renderer is not None:
+            self.dirty_renderer.render()
+            return
+
+        self.world_surface().fill((0, 0, 0))
+        self.draw_static()
+        self.profiler.lap('tiles')
+
+        self.draw_entities()
+        self.profiler.lap('entities')
+
+        if self.canvas is not None:
+            self.present()
+            self.profiler.lap('scale')
+
+        self.draw_ui()
+        self.profiler.lap('ui')
 
         pygame.display.flip()
+        self.profiler.lap('flip')
 
     def get_platforms(self):
-        platforms = []
-        for y, row in enumerate(self.map):
-            for x, tile in enumerate(row):
-                if tile != '0' and tile in self.tiles:
-                    platforms.append(pygame.Rect(
-                        x * self.tile_size,
-                        y * self.tile_size,
-                        self.tile_size,
-                        self.tile_size
-                    ))
-        return platforms
+        return list(self.collision_grid)
 
     def game_over(self):
         self.sound_manager.stop_music()
         self.sound_manager.play_sound('game_over')
-        game_over_text = self.font.render("GAME OVER!", True, (255, 0, 0))
+        if self.headless:
+            self.running = False
+            return
+        game_over_text = text_cache.render(self.font, "GAME OVER!", (255, 0, 0))
         self.screen.blit(game_over_text, (self.width // 2 - 100, self.height // 2))
         pygame.display.flip()
         pygame.time.wait(2000)  # Wait for 2 seconds
         self.running = False
 
+    def run_headless(self, ticks=None, dt=None):
+        # Fixed-step loop with no rendering and no frame cap; returns ticks run
+        if dt is None:
+            dt = self.timestep.step
+        if ticks is None and self.input_source is None:
+            raise ValueError("run_headless needs a tick count or an input source")
+        tick = 0
+        while self.running and (ticks is None or tick < ticks):
+            if self.input_source is not None:
+                if ticks is None and self.input_source.done():
+                    break
+                events = self.input_source.poll()
+            else:
+                events = ()
+            self.profiler.begin_frame()
+            self.handle_events(events)
+            self.record(dt, events)
+            self.profiler.lap('events')
+            self.update(dt)
+            self.profiler.end_frame()
+            tick += 1
+        self.dump_profile()
+        self.save_recording()
+        return tick
+
+    def play_replay(self, replay, realtime=False):
+        # Feeds a recording through the normal event path at its recorded
+        # steps, rendering and pacing to real time if asked; returns ticks run
+        source = replay.input()
+        self.in_menu = False
+        tick = 0
+        for dt in replay.dts:
+            if not self.running:
+                break
+            self.profiler.begin_frame()
+            self.handle_events(source.poll())
+            self.profiler.lap('events')
+            self.update(dt)
+            if realtime:
+                self.render()
+                self.clock.tick(1 / dt if dt > 0 else 0)
+            self.profiler.end_frame()
+            tick += 1
+        self.dump_profile()
+        return tick
+
+    def record(self, dt, events):
+        if self.recorder is not None:
+            self.recorder.record(dt, events)
+
+    def save_recording(self):
+        if self.recorder is not None:
+            self.recorder.replay(self).save(self.record_to)
+
+    def dump_profile(self):
+        if self.profiler.enabled and self.profile_out:
+            self.profiler.dump(self.profile_out, startup=self.startup)
+
     def run(self):
+        if self.headless:
+            return self.run_headless()
+        pending = []
         while self.running:
             if self.in_menu:
-                self.handle_menu_events()
+                # The menu is static: sleep until input (or a periodic
+                # redraw) instead of spinning, and cap its frame rate
                 self.render_menu()
+                event = pygame.event.wait(self.menu_redraw_ms)
+                events = pygame.event.get()
+                if event.type != pygame.NOEVENT:
+                    events.insert(0, event)
+                self.handle_menu_events(events)
+                self.clock.tick(self.menu_fps)
+                if not self.in_menu:
+                    # Time spent in the menu is not game time
+                    self.clock.tick()
             else:
-                dt = self.clock.tick(60) / 1000.0
-                self.handle_events()
-                self.update(dt)
-                self.render()
+                self.timestep.add(self.clock.tick(self.render_fps) / 1000.0)
+                self.profiler.begin_frame()
+                events = pygame.event.get()
+                self.handle_events(events)
+                self.profiler.lap('events')
+                # Events reach the recording on the next physics step
+                pending.extend(events)
+                for dt in self.timestep.steps():
+                    self.record(dt, pending)
+                    pending = []
+                    self.save_positions()
+                    self.update(dt)
+                    if not self.running:
+                        break
+                if self.running:
+                    self.render(self.timestep.alpha)
+                self.profiler.end_frame()
+        self.dump_profile()
+        self.save_recording()
+        loader.shutdown()
 
 if __name__ == "__main__":
     game = Game(start_x=0, end_x=1500)
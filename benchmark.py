@@ -0,0 +1,193 @@
+#usr/bin/env python3
+"""Frame cost benchmarks for the game.
+
+Generates synthetic levels in the map.csv format, fills them with
+enemies, coins and projectiles, and times the game phases separately
+with the dummy video driver. Results are written as JSON so runs can be
+compared between commits:
+
+    python benchmark.py --out bench.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+os.environ['SDL_AUDIODRIVER'] = 'dummy'
+
+import pygame
+from Game import Game
+from scripts.enemy import EnemyManager
+from scripts import tilemap
+
+
+def generate_map(filename, width, height, seed=0):
+    rng = random.Random(seed)
+    rows = [['0'] * width for _ in range(height)]
+    # Solid ground with a few gaps, topped with grass tiles
+    for x in range(width):
+        if x > 4 and rng.random() < 0.05:
+            continue
+        rows[height - 1][x] = '5'
+        rows[height - 2][x] = '2'
+    # Floating platforms and decorations
+    for _ in range(width * height // 40):
+        x = rng.randrange(width - 3)
+        y = rng.randrange(2, height - 3)
+        rows[y][x:x + 3] = ['14', '15', '16']
+        if y > 0 and rng.random() < 0.5:
+            rows[y - 1][x + 1] = str(rng.randrange(17, 68))
+    with open(filename, 'w', newline='') as file:
+        file.write('\r\n'.join(','.join(row) for row in rows))
+
+
+def populate(game, enemies, coins, projectiles, seed=0):
+    rng = random.Random(seed)
+    level_width = len(game.map[0]) * game.tile_size
+    level_height = len(game.map) * game.tile_size
+
+    def random_pos():
+        return (rng.randrange(0, level_width), rng.randrange(0, level_height - 2 * game.tile_size))
+
+    sight = game.enemy_manager.sight
+    game.enemy_manager = EnemyManager(game.player, game.projectiles)
+    game.enemy_manager.sight = sight
+    for _ in range(enemies):
+        game.spawn('enemy', random_pos())
+    game.enemies = game.enemy_manager.enemies
+    game.coins.clear()
+    for _ in range(coins):
+        game.spawn('coin', random_pos())
+    game.projectiles.clear()
+    for i in range(projectiles):
+        owner = id(game.enemies[i % len(game.enemies)]) if game.enemies else 0
+        game.projectiles.spawn(random_pos(), rng.choice((0, math.pi)), 2, owner=owner)
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        'mean_ms': statistics.fmean(samples) * 1000,
+        'p50_ms': samples[len(samples) // 2] * 1000,
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+        'min_ms': samples[0] * 1000,
+        'max_ms': samples[-1] * 1000,
+    }
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def time_collisions(player, collision_grid):
+    saved = (list(player.pos), list(player.velocity), player.on_ground, player.coyote_time)
+    start = time.perf_counter()
+    # One tick's worth of swept movement along each axis
+    player.check_horizontal_collisions(collision_grid, player.velocity[0])
+    player.check_vertical_collisions(collision_grid, player.velocity[1])
+    elapsed = time.perf_counter() - start
+    player.pos, player.velocity, player.on_ground, player.coyote_time = saved
+    return elapsed
+
+
+def run_scenario(map_file, enemies, coins, projectiles, frames, seed, activity_margin=None):
+    # activity_margin=None simulates the whole level, as the game did before
+    # off-screen sleeping; the 'lod' scenario passes the game's default
+    with contextlib.redirect_stdout(io.StringIO()):
+        game = Game(headless=True, map_file=map_file, activity_margin=activity_margin)
+    populate(game, enemies, coins, projectiles, seed)
+    game.movement = [False, True]
+    phases = {'update': [], 'render': [], 'get_platforms': [], 'collisions': []}
+    for _ in range(frames):
+        game.running = True
+        phases['update'].append(timed(game.update, 1 / 60))
+        phases['render'].append(timed(game.render))
+        phases['get_platforms'].append(timed(game.get_platforms))
+        phases['collisions'].append(time_collisions(game.player, game.collision_grid))
+    return {phase: summarize(samples) for phase, samples in phases.items()}
+
+
+def time_map_loading(csv_file, binary_file, repeats=3):
+    tilemap.convert(csv_file, binary_file)
+    return {
+        'csv_ms': min(timed(tilemap.load, csv_file) for _ in range(repeats)) * 1000,
+        'binary_ms': min(timed(tilemap.load, binary_file) for _ in range(repeats)) * 1000,
+        'csv_bytes': os.path.getsize(csv_file),
+        'binary_bytes': os.path.getsize(binary_file),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_size(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Dune Dash frame phases.")
+    parser.add_argument('--sizes', default='20x15,500x50,5000x100', help="comma separated WIDTHxHEIGHT map sizes in tiles")
+    parser.add_argument('--enemies', type=int, default=200)
+    parser.add_argument('--coins', type=int, default=500)
+    parser.add_argument('--projectiles', type=int, default=500)
+    parser.add_argument('--frames', type=int, default=120)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='bench.json')
+    args = parser.parse_args()
+
+    results = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'frames': args.frames,
+        'map_loading': {},
+        'scenarios': [],
+    }
+    crowd = (args.enemies, args.coins, args.projectiles)
+    scenarios = [('empty', (0, 0, 0), None), ('crowded', crowd, None), ('lod', crowd, 200)]
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes.split(','):
+            width, height = parse_size(size)
+            map_file = os.path.join(tmp, f"map_{width}x{height}.csv")
+            generate_map(map_file, width, height, args.seed)
+            loading = time_map_loading(map_file, os.path.join(tmp, f"map_{width}x{height}.dmap"))
+            results['map_loading'][f"{width}x{height}"] = loading
+            print(f"{width}x{height} load: csv {loading['csv_ms']:.3f}ms, binary {loading['binary_ms']:.3f}ms")
+            for name, (enemies, coins, projectiles), margin in scenarios:
+                phases = run_scenario(map_file, enemies, coins, projectiles, args.frames, args.seed, margin)
+                results['scenarios'].append({
+                    'map': f"{width}x{height}",
+                    'name': name,
+                    'enemies': enemies,
+                    'coins': coins,
+                    'projectiles': projectiles,
+                    'activity_margin': margin,
+                    'phases': phases,
+                })
+                print(f"{width}x{height} {name}: " + ", ".join(
+                    f"{phase} {stats['mean_ms']:.3f}ms" for phase, stats in phases.items()))
+
+    with open(args.out, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
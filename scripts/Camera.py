@@ -2,6 +2,7 @@
 """Camera class for the game."""
 
 import pygame
+from scripts.timestep import scale
 
 
 
@@ -10,6 +11,11 @@ class Camera:
         self.width = width
         self.height = height
         self.scroll = [0, 0]
+        self.prev_scroll = [0, 0]
+        # Framebuffer pixels per world pixel
+        self.zoom = 1
+        # Share of the distance to the target closed per 60 Hz step
+        self.follow = 1 / 20
         self.map_width = map_width
         self.map_height = map_height
         self.tile_size = 32
@@ -17,14 +23,25 @@ class Camera:
         self.min_scroll_x = 100
         self.max_scroll_x = self.map_width * self.tile_size - width - 100
 
+    def view_rect(self, margin=0):
+        # The visible part of the world, grown by `margin` on every side
+        return pygame.Rect(self.scroll[0] - margin, self.scroll[1] - margin,
+                           self.width + 2 * margin, self.height + 2 * margin)
+
+    def to_screen(self, x, y):
+        return ((x - self.scroll[0]) * self.zoom, (y - self.scroll[1]) * self.zoom)
+
     def apply(self, entity):
-        return [entity.pos[0] - self.scroll[0], entity.pos[1] - self.scroll[1]]
+        return list(self.to_screen(*entity.pos))
 
-    def update(self, target):
-        self.scroll[0] += (target.pos[0] - self.scroll[0] - self.width // 2) // 20
+    def update(self, target, dt=1 / 60):
+        # Compounded over the step, so the camera follows at the same speed
+        # whatever the physics rate
+        follow = 1 - (1 - self.follow) ** scale(dt)
+        self.scroll[0] += (target.pos[0] - self.scroll[0] - self.width // 2) * follow
         
         if target.pos[1] < self.max_scroll_y + self.height:
             target_scroll_y = max(0, min(target.pos[1] - self.height // 2, self.max_scroll_y))
-            self.scroll[1] += (target_scroll_y - self.scroll[1]) // 20
+            self.scroll[1] += (target_scroll_y - self.scroll[1]) * follow
         
         self.scroll[1] = max(0, self.scroll[1])
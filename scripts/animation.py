@@ -0,0 +1,81 @@
+#usr/bin/env python3
+"""animation clips for the game."""
+
+import pygame
+
+
+class AnimationClip:
+    """Pre-flipped frames for an animations dict.
+
+    Both facings of every frame are built once, so looking up a sprite
+    by (state, frame, facing) never allocates a surface.
+    """
+
+    def __init__(self, animations):
+        self.animations = animations
+        self.lengths = {state: len(frames) for state, frames in animations.items()}
+        right = {state: tuple(frames) for state, frames in animations.items()}
+        left = {
+            state: tuple(pygame.transform.flip(frame, True, False) for frame in frames)
+            for state, frames in animations.items()
+        }
+        # Indexed by facing_right: False -> left, True -> right
+        self.facings = (left, right)
+        self.scales = {}
+
+    def get(self, state, frame, facing_right=True):
+        return self.facings[facing_right][state][frame]
+
+    def scaled(self, size):
+        size = tuple(size)
+        clip = self.scales.get(size)
+        if clip is None:
+            clip = AnimationClip({
+                state: [pygame.transform.scale(frame, size) for frame in frames]
+                for state, frames in self.animations.items()
+            })
+            self.scales[size] = clip
+        return clip
+
+
+class Animator:
+    """Per-entity playback state (state, frame, timer) over a shared clip."""
+
+    def __init__(self, clip, state, speed):
+        self.clip = clip
+        self.state = state
+        self.speed = speed
+        self.frame = 0
+        self.time = 0
+
+    def play(self, state):
+        if state != self.state:
+            self.state = state
+            self.frame %= self.clip.lengths[state]
+
+    def restart(self):
+        self.frame = 0
+
+    def advance(self, dt):
+        self.time += dt
+        if self.time >= self.speed:
+            self.time = 0
+            self.frame = (self.frame + 1) % self.clip.lengths[self.state]
+            return True
+        return False
+
+    def sprite(self, facing_right=True):
+        return self.clip.get(self.state, self.frame, facing_right)
+
+
+_clips = {}
+
+
+def clip_for(animations):
+    # Entities built from the same cached frames share one clip
+    key = tuple((state, tuple(id(frame) for frame in frames)) for state, frames in animations.items())
+    clip = _clips.get(key)
+    if clip is None:
+        clip = AnimationClip(animations)
+        _clips[key] = clip
+    return clip
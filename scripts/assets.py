@@ -0,0 +1,100 @@
+#usr/bin/env python3
+"""asset cache for the game."""
+
+import pygame
+from scripts.loader import loader
+
+
+class AssetCache:
+    """Decodes each image once and hands out shared surfaces.
+
+    Surfaces are keyed by path, size and flags and shared by every
+    caller, so they must be treated as read-only. prefetch() starts
+    decoding files in the background; image() then only has to convert.
+    Images found in an atlas bundle (see use_bundle) are not decoded at
+    all. With use_scale, images are also resized for a framebuffer that
+    is smaller (or larger) than the window.
+    """
+
+    def __init__(self):
+        self.surfaces = {}
+        # Paths with at least one surface cached, so prefetch() can skip them
+        self.loaded = set()
+        self.pending = {}
+        self.atlas = None
+        self.scale = 1
+        self.hits = 0
+        self.misses = 0
+
+    def prefetch(self, paths):
+        for path in paths:
+            if path in self.pending or path in self.loaded or (self.atlas and path in self.atlas.paths):
+                continue
+            self.pending[path] = loader.image(path)
+
+    def image(self, path, size=None, alpha=True, colorkey=None):
+        # alpha=False converts to the opaque display format, so transparent
+        # pixels come out as their stored colour; only use it for opaque images
+        key = (path, tuple(size) if size else None, alpha, colorkey, self.scale)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self.atlas.image(path, key[1]) if self.atlas is not None else None
+        if surface is not None:
+            # Colour-keyed and opaque images need pixels of their own
+            if colorkey is not None or not alpha:
+                surface = surface.copy() if alpha else surface.convert()
+        else:
+            future = self.pending.pop(path, None)
+            surface = future.result() if future is not None else pygame.image.load(path)
+            surface = surface.convert_alpha() if alpha else surface.convert()
+            if size:
+                surface = pygame.transform.scale(surface, key[1])
+        if self.scale != 1:
+            surface = pygame.transform.scale(surface, self.scaled_size(surface.get_size()))
+        if colorkey is not None:
+            surface.set_colorkey(colorkey)
+        self.surfaces[key] = surface
+        self.loaded.add(path)
+        return surface
+
+    def use_bundle(self, atlas):
+        self.atlas = atlas
+        self.surfaces.clear()
+        self.loaded.clear()
+
+    def use_scale(self, scale):
+        # Applies to images requested from now on; each scale is cached apart
+        self.scale = scale
+
+    def scaled_size(self, size):
+        return tuple(max(1, round(n * self.scale)) for n in size)
+
+    def frame_paths(self, folder, prefix, frame_count):
+        return [f"{folder}/{prefix}{str(i).zfill(2)}.png" for i in range(frame_count)]
+
+    def frames(self, folder, prefix, frame_count, size=None, alpha=True):
+        return [self.image(path, size, alpha) for path in self.frame_paths(folder, prefix, frame_count)]
+
+    def memory_usage(self):
+        return sum(surface.get_pitch() * surface.get_height() for surface in self.surfaces.values())
+
+    def stats(self):
+        return {
+            'entries': len(self.surfaces),
+            'hits': self.hits,
+            'misses': self.misses,
+            'bytes': self.memory_usage(),
+        }
+
+    def clear(self):
+        self.surfaces.clear()
+        self.loaded.clear()
+        self.pending.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+assets = AssetCache()
@@ -0,0 +1,130 @@
+#usr/bin/env python3
+"""texture atlas bundles for the game.
+
+A bundle is a single file holding a few atlas pages plus an index of
+where each image sits on them. Images are baked at the size the game
+draws them, and pages are stored as raw RGBA pixels, so loading a bundle
+memory-maps one file and decodes nothing:
+
+    header    magic, version, page count, index length
+    index     JSON: pages as [width, height, offset], entries as
+              [path, size or null, page, [x, y, w, h]]
+    pages     RGBA rows; page offsets count from the end of the index
+
+Build the bundle for the current assets with:
+
+    python -m scripts.atlas assets.dab
+"""
+
+import json
+import mmap
+import struct
+import sys
+import numpy as np
+import pygame
+
+MAGIC = b'DDAB'
+VERSION = 1
+HEADER = struct.Struct('<4sHHI')  # magic, version, pages, index length
+PAGE_SIZE = 1024
+
+
+def pack(sizes, page_size=PAGE_SIZE):
+    # Shelf packing, tallest first; returns (page, x, y) per size and the page sizes
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    places = [None] * len(sizes)
+    pages = []
+    x = y = shelf = 0
+    for i in order:
+        width, height = sizes[i]
+        if width > page_size or height > page_size:
+            raise ValueError(f"image of size {width}x{height} does not fit on an atlas page")
+        if x + width > page_size:
+            x, y, shelf = 0, y + shelf, 0
+        if not pages or y + height > page_size:
+            pages.append([0, 0])
+            x = y = shelf = 0
+        places[i] = (len(pages) - 1, x, y)
+        page = pages[-1]
+        page[0] = max(page[0], x + width)
+        page[1] = max(page[1], y + height)
+        x += width
+        shelf = max(shelf, height)
+    return places, pages
+
+
+def build(filename, images, page_size=PAGE_SIZE):
+    # images: (path, size) pairs, size None keeps the file's own size
+    pixels = []
+    for path, size in images:
+        surface = pygame.image.load(path)
+        if size:
+            surface = pygame.transform.scale(surface, size)
+        width, height = surface.get_size()
+        pixels.append(np.frombuffer(pygame.image.tobytes(surface, 'RGBA'), np.uint8).reshape(height, width, 4))
+    places, page_sizes = pack([(p.shape[1], p.shape[0]) for p in pixels], page_size)
+
+    pages = [np.zeros((height, width, 4), np.uint8) for width, height in page_sizes]
+    entries = []
+    for (path, size), data, (page, x, y) in zip(images, pixels, places):
+        height, width = data.shape[:2]
+        pages[page][y:y + height, x:x + width] = data
+        entries.append([path, list(size) if size else None, page, [x, y, width, height]])
+
+    offsets = np.cumsum([0] + [page.nbytes for page in pages]).tolist()
+    index = {
+        'pages': [[width, height, offset] for (width, height), offset in zip(page_sizes, offsets)],
+        'entries': entries,
+    }
+    encoded = json.dumps(index).encode()
+
+    with open(filename, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(pages), len(encoded)))
+        file.write(encoded)
+        for page in pages:
+            file.write(page.tobytes())
+
+
+class Atlas:
+    """A memory-mapped bundle; pages are converted on first use."""
+
+    def __init__(self, filename):
+        with open(filename, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, page_count, index_length = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise ValueError(f"{filename}: not a Dune Dash asset bundle")
+        if version != VERSION:
+            raise ValueError(f"{filename}: unsupported bundle version {version}")
+        index = json.loads(bytes(self.data[HEADER.size:HEADER.size + index_length]))
+        self.base = HEADER.size + index_length
+        self.page_info = index['pages']
+        self.pages = [None] * page_count
+        self.entries = {
+            (path, tuple(size) if size else None): (page, pygame.Rect(rect))
+            for path, size, page, rect in index['entries']
+        }
+        self.paths = {path for path, _ in self.entries}
+
+    def page(self, i):
+        if self.pages[i] is None:
+            width, height, offset = self.page_info[i]
+            start = self.base + offset
+            view = memoryview(self.data)[start:start + width * height * 4]
+            self.pages[i] = pygame.image.frombuffer(view, (width, height), 'RGBA').convert_alpha()
+        return self.pages[i]
+
+    def image(self, path, size=None):
+        # A subsurface sharing the page's pixels, or None if not in the bundle
+        entry = self.entries.get((path, tuple(size) if size else None))
+        if entry is None:
+            return None
+        page, rect = entry
+        return self.page(page).subsurface(rect)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python -m scripts.atlas BUNDLE.dab")
+    from Game import gameplay_assets
+    build(sys.argv[1], gameplay_assets())
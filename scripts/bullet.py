@@ -1,27 +1,125 @@
 #usr/bin/env python3
-"""projectile class for the game."""
-import pygame
+"""projectile pool for the game."""
 import math
+import numpy as np
+from scripts.assets import assets
+from scripts.timestep import scale
 
 
 
-class Projectile:
-    def __init__(self, pos, direction, speed):
-        self.pos = list(pos)
-        self.direction = direction
-        self.speed = speed
-        self.size = 9
-        self.image = pygame.image.load("projectile.png")
-        self.image.set_colorkey((255,255,255))
-        self.image.convert()
-        self.image = pygame.transform.scale(self.image, (self.size, self.size))
+class ProjectilePool:
+    """All live projectiles, stored as NumPy arrays.
 
-    def update(self, dt):
-        self.pos[0] += math.cos(self.direction) * self.speed
-        
+    Movement, expiry, off-map culling and hits against a target rect are
+    done for every projectile in one batched pass. Slots of dead
+    projectiles are reused by later shots.
+    """
 
-    def rect(self):
-        return pygame.Rect(self.pos[0], self.pos[1], self.size, self.size)
+    def __init__(self, capacity=64, size=9, lifetime=10, bounds=None):
+        self.size = size
+        self.lifetime = lifetime
+        self.bounds = bounds
+        self.pos = np.zeros((capacity, 2))
+        # Positions before the last update, for render interpolation
+        self.prev = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.life = np.zeros(capacity)
+        self.owner = np.zeros(capacity, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.free = list(range(capacity - 1, -1, -1))
+        self.count = 0
+        self.image = assets.image("projectile.png", (self.size, self.size))
+
+    def __len__(self):
+        return self.count
+
+    def grow(self):
+        capacity = len(self.alive)
+        extra = max(capacity, 1)
+        self.pos = np.concatenate((self.pos, np.zeros((extra, 2))))
+        self.prev = np.concatenate((self.prev, np.zeros((extra, 2))))
+        self.vel = np.concatenate((self.vel, np.zeros((extra, 2))))
+        self.life = np.concatenate((self.life, np.zeros(extra)))
+        self.owner = np.concatenate((self.owner, np.zeros(extra, dtype=np.int64)))
+        self.alive = np.concatenate((self.alive, np.zeros(extra, dtype=bool)))
+        self.free.extend(range(capacity + extra - 1, capacity - 1, -1))
+
+    def spawn(self, pos, direction, speed, owner=0):
+        if not self.free:
+            self.grow()
+        i = self.free.pop()
+        self.pos[i] = pos
+        self.prev[i] = pos
+        self.vel[i] = (math.cos(direction) * speed, 0)
+        self.life[i] = self.lifetime
+        self.owner[i] = owner
+        self.alive[i] = True
+        self.count += 1
+        return i
+
+    def kill(self, mask):
+        dead = np.flatnonzero(mask & self.alive)
+        if len(dead):
+            self.alive[dead] = False
+            self.free.extend(dead.tolist())
+            self.count -= len(dead)
+        return len(dead)
+
+    def remove_owner(self, owner):
+        return self.kill(self.owner == owner)
+
+    def clear(self):
+        self.kill(self.alive)
+
+    def outside(self, rect):
+        x = self.pos[:, 0]
+        y = self.pos[:, 1]
+        return ((x + self.size < rect.left) | (x > rect.right) |
+                (y + self.size < rect.top) | (y > rect.bottom))
+
+    def update(self, dt, target_rect=None, region=None, collision_grid=None):
+        # Returns how many projectiles hit target_rect; those are removed.
+        # Projectiles that leave the level bounds or the active region are
+        # dropped rather than simulated off-screen, and with a collision
+        # grid they stop at the first solid tile in their path.
+        if not self.count:
+            return 0
+        self.prev[:] = self.pos
+        delta = self.vel * scale(dt)
+        walled = None
+        if collision_grid is not None:
+            live = np.flatnonzero(self.alive)
+            t = collision_grid.sweep_boxes(self.pos[live], self.size, delta[live])
+            delta[live] *= t[:, None]
+            walled = np.zeros(len(self.alive), dtype=bool)
+            walled[live] = t < 1
+        self.pos += delta
+        self.life -= dt
+        expired = self.life <= 0
+        if self.bounds is not None:
+            expired |= self.outside(self.bounds)
+        if region is not None:
+            expired |= self.outside(region)
+        self.kill(expired)
+        hits = 0
+        if target_rect is not None:
+            # Same truncation and overlap test as pygame.Rect.colliderect
+            ix = self.pos[:, 0].astype(np.int64)
+            iy = self.pos[:, 1].astype(np.int64)
+            hit = (self.alive &
+                   (ix < target_rect.right) & (ix + self.size > target_rect.left) &
+                   (iy < target_rect.bottom) & (iy + self.size > target_rect.top))
+            hits = self.kill(hit)
+        if walled is not None:
+            self.kill(walled)
+        return hits
 
     def render(self, screen, camera):
-        screen.blit(self.image, (self.pos[0] - camera.scroll[0], self.pos[1] - camera.scroll[1]))
+        # Returns the screen rects drawn
+        if not self.count:
+            return []
+        x, y = camera.to_screen(self.pos[:, 0], self.pos[:, 1])
+        width, height = screen.get_size()
+        visible = self.alive & (x > -self.size) & (x < width) & (y > -self.size) & (y < height)
+        image = self.image
+        return screen.blits([(image, pos) for pos in np.column_stack((x[visible], y[visible])).tolist()])
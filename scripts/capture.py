@@ -0,0 +1,99 @@
+#usr/bin/env python3
+"""frame capture and observations for the game."""
+
+import numpy as np
+import pygame
+
+SYMBOLS = ('solid', 'coin', 'enemy', 'projectile', 'player')
+
+
+class FrameCapture:
+    """An offscreen render target whose pixels are a NumPy array.
+
+    The surface is built over the array with pygame.image.frombuffer, so
+    `pixels` (and the `rgb` view of it) always show the last frame
+    rendered into `surface` without copying or locking. With `obs_size`
+    set, observe() also scales each frame into a small surface that is
+    likewise array-backed, optionally reduced to grayscale.
+    """
+
+    def __init__(self, width, height, obs_size=None, grayscale=False):
+        # BGRA matches the usual 32-bit display format, so blits stay fast
+        self.pixels = np.zeros((height, width, 4), dtype=np.uint8)
+        self.surface = pygame.image.frombuffer(self.pixels, (width, height), 'BGRA')
+        self.obs_size = obs_size
+        self.grayscale = grayscale
+        if obs_size:
+            obs_width, obs_height = obs_size
+            self.small_pixels = np.zeros((obs_height, obs_width, 4), dtype=np.uint8)
+            self.small = pygame.image.frombuffer(self.small_pixels, obs_size, 'BGRA')
+        self.gray = np.zeros(self.obs_shape()[:2], dtype=np.uint8)
+        self.weights = np.zeros(self.gray.shape, dtype=np.uint16)
+
+    @property
+    def rgb(self):
+        # (height, width, 3) view in RGB order; no copy
+        return self.pixels[..., 2::-1]
+
+    def obs_shape(self):
+        height, width = self.pixels.shape[:2]
+        if self.obs_size:
+            width, height = self.obs_size
+        return (height, width) if self.grayscale else (height, width, 3)
+
+    def observe(self):
+        # Returns a view into buffers that the next call overwrites
+        pixels = self.pixels
+        if self.obs_size:
+            pygame.transform.scale(self.surface, self.obs_size, self.small)
+            pixels = self.small_pixels
+        if not self.grayscale:
+            return pixels[..., 2::-1]
+        # Integer luma, (77 R + 150 G + 29 B) / 256, without float temporaries
+        weights = self.weights
+        np.multiply(pixels[..., 2], 77, out=weights, dtype=np.uint16)
+        weights += pixels[..., 1].astype(np.uint16) * 150
+        weights += pixels[..., 0].astype(np.uint16) * 29
+        np.right_shift(weights, 8, out=weights)
+        self.gray[:] = weights
+        return self.gray
+
+
+def symbolic_observation(game, cols=20, rows=15, out=None):
+    """A (len(SYMBOLS), rows, cols) uint8 grid of tiles around the player.
+
+    Each channel marks one kind of thing per tile: solid ground, coins,
+    enemies, projectiles and the player, built straight from the tile
+    grid and entity positions without rendering.
+    """
+    if out is None:
+        out = np.zeros((len(SYMBOLS), rows, cols), dtype=np.uint8)
+    else:
+        out[:] = 0
+    tile = game.tile_size
+    player = game.player
+    x0 = int(player.pos[0] + player.size / 2) // tile - cols // 2
+    y0 = int(player.pos[1] + player.size / 2) // tile - rows // 2
+
+    grid = game.collision_grid
+    tx0, ty0 = max(x0, 0), max(y0, 0)
+    tx1, ty1 = min(x0 + cols, grid.cols), min(y0 + rows, grid.rows)
+    if tx0 < tx1 and ty0 < ty1:
+        out[0, ty0 - y0:ty1 - y0, tx0 - x0:tx1 - x0] = grid.mask[ty0:ty1, tx0:tx1]
+
+    def mark(channel, positions):
+        if not len(positions):
+            return
+        cells = (np.asarray(positions, dtype=np.float64) // tile).astype(np.int64) - (x0, y0)
+        inside = (cells[:, 0] >= 0) & (cells[:, 0] < cols) & (cells[:, 1] >= 0) & (cells[:, 1] < rows)
+        cells = cells[inside]
+        out[channel, cells[:, 1], cells[:, 0]] = 1
+
+    window = pygame.Rect(x0 * tile, y0 * tile, cols * tile, rows * tile)
+    mark(1, [coin.rect.center for coin in game.coins.query(window)])
+    manager = game.enemy_manager
+    mark(2, manager.pos[:len(manager)] + manager.size[:len(manager), None] / 2)
+    projectiles = game.projectiles
+    mark(3, projectiles.pos[projectiles.alive] + projectiles.size / 2)
+    mark(4, [(player.pos[0] + player.size / 2, player.pos[1] + player.size / 2)])
+    return out
@@ -0,0 +1,84 @@
+#usr/bin/env python3
+"""static tile chunk cache for the game."""
+
+import pygame
+import numpy as np
+from collections import OrderedDict
+
+
+class TileChunkCache:
+    """Bakes the static tile layers into fixed-size chunk surfaces.
+
+    Each frame only the chunks overlapping the viewport are blitted,
+    instead of walking every cell of the map. Chunks are baked the first
+    time they become visible and the least recently drawn ones are
+    dropped once more than `max_chunks` are held.
+    """
+
+    def __init__(self, grids, tile_size, layers, chunk_size=16, max_chunks=64):
+        self.grids = grids
+        self.tile_size = tile_size
+        self.layers = layers
+        self.chunk_size = chunk_size
+        self.chunk_px = chunk_size * tile_size
+        self.max_chunks = max_chunks
+        self.chunks = OrderedDict()
+        self.rebuild()
+
+    def rebuild(self):
+        self.chunks.clear()
+        rows, cols = self.grids[0].shape
+        self.chunk_rows = -(-rows // self.chunk_size)
+        self.chunk_cols = -(-cols // self.chunk_size)
+
+    def bake(self, cx, cy):
+        x0 = cx * self.chunk_size
+        y0 = cy * self.chunk_size
+        surface = None
+        # Map layers, then tile sets, are drawn in order; later ones end up on top
+        for grid in self.grids:
+            block = grid[y0:y0 + self.chunk_size, x0:x0 + self.chunk_size]
+            ys, xs = np.nonzero(block)
+            cells = list(zip(ys.tolist(), xs.tolist(), block[ys, xs].tolist()))
+            for layer in self.layers:
+                for y, x, tile in cells:
+                    if tile in layer:
+                        if surface is None:
+                            surface = pygame.Surface((self.chunk_px, self.chunk_px), pygame.SRCALPHA).convert_alpha()
+                        surface.blit(layer[tile], (x * self.tile_size, y * self.tile_size))
+        # Empty chunks are cached as None, so they cost nothing to draw
+        self.chunks[(cx, cy)] = surface
+        if len(self.chunks) > self.max_chunks:
+            self.chunks.popitem(last=False)
+        return surface
+
+    def chunk(self, cx, cy):
+        key = (cx, cy)
+        if key in self.chunks:
+            self.chunks.move_to_end(key)
+            return self.chunks[key]
+        return self.bake(cx, cy)
+
+    def invalidate(self, x, y):
+        cx = x // self.chunk_size
+        cy = y // self.chunk_size
+        if cx >= self.chunk_cols or cy >= self.chunk_rows:
+            self.rebuild()
+        elif (cx, cy) in self.chunks:
+            self.bake(cx, cy)
+
+    def visible_chunks(self, scroll, width, height):
+        cx0 = max(0, int(scroll[0] // self.chunk_px))
+        cy0 = max(0, int(scroll[1] // self.chunk_px))
+        cx1 = min(self.chunk_cols - 1, int((scroll[0] + width) // self.chunk_px))
+        cy1 = min(self.chunk_rows - 1, int((scroll[1] + height) // self.chunk_px))
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                yield cx, cy
+
+    def render(self, screen, scroll):
+        width, height = screen.get_size()
+        for cx, cy in self.visible_chunks(scroll, width, height):
+            surface = self.chunk(cx, cy)
+            if surface is not None:
+                screen.blit(surface, (cx * self.chunk_px - scroll[0], cy * self.chunk_px - scroll[1]))
@@ -2,6 +2,7 @@
 """coin class for the game."""
 
 import pygame
+from scripts.assets import assets
 
 
 class Coin:
@@ -9,13 +10,11 @@ class Coin:
         self.sound_manager = sound_manager
         self.pos = pos
         self.size = size
-        self.image = pygame.image.load("coin.png").convert_alpha()
-        self.image = pygame.transform.scale(self.image, (self.size, self.size))
-        self.image.set_colorkey((255, 255, 255))
+        self.image = assets.image("coin.png", (self.size, self.size), colorkey=(255, 255, 255))
         self.rect = pygame.Rect(self.pos[0], self.pos[1], self.size, self.size)
 
     def render(self, screen, camera):
-        screen.blit(self.image, (self.pos[0] - camera.scroll[0], self.pos[1] - camera.scroll[1]))
+        return screen.blit(self.image, camera.to_screen(*self.pos))
 
     def collect(self, player):
         if self.rect.colliderect(player.rect()):
@@ -0,0 +1,137 @@
+#usr/bin/env python3
+"""collision grid for the game."""
+
+import math
+import pygame
+import numpy as np
+
+
+class CollisionGrid:
+    """Uniform grid of the solid tiles in a map, as a boolean mask.
+
+    Built once from the map's tile grid and kept up to date one cell at a
+    time with set_solid(); sweeps only visit the cells a moving box
+    crosses, so their cost does not depend on the size of the map.
+    """
+
+    def __init__(self, grid, tile_size, solid_tiles):
+        self.tile_size = tile_size
+        self.rows, self.cols = grid.shape
+        self.solid_tiles = frozenset(solid_tiles)
+        self.mask = np.isin(grid, list(solid_tiles))
+
+    def __len__(self):
+        return int(np.count_nonzero(self.mask))
+
+    def __iter__(self):
+        # Row by row, left to right
+        ys, xs = np.nonzero(self.mask)
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            yield self.cell_rect(x, y)
+
+    def is_solid(self, x, y):
+        return 0 <= x < self.cols and 0 <= y < self.rows and bool(self.mask[y, x])
+
+    def set_solid(self, x, y, solid):
+        self.mask[y, x] = solid
+
+    def cell_rect(self, x, y):
+        return pygame.Rect(x * self.tile_size, y * self.tile_size, self.tile_size, self.tile_size)
+
+    def sweep(self, x, y, w, h, dx, dy):
+        """Moves the box (x, y, w, h) by (dx, dy) through the grid.
+
+        Walks the tile columns and rows the box's leading edges cross, in
+        the order it crosses them, and returns (x, y, normal): where the
+        box stops and the normal of the face it stopped against, or None
+        if the path is clear. Cells the box already overlaps are ignored,
+        so it can always move out of them.
+        """
+        tx, nx = self.sweep_axis(x, w, dx, y, h, dy, False)
+        ty, ny = self.sweep_axis(y, h, dy, x, w, dx, True)
+        t = min(tx, ty)
+        new_x = x + dx * t
+        new_y = y + dy * t
+        # An axis that made contact is put exactly on the face; rounding in
+        # d * t could otherwise leave the box a hair inside the tile
+        if nx is not None and tx <= t:
+            new_x = self.snap(new_x, w, nx[0])
+        if ny is not None and ty <= t:
+            new_y = self.snap(new_y, h, ny[1])
+        normal = nx if nx is not None and tx <= ty else ny
+        return new_x, new_y, normal
+
+    def snap(self, pos, length, normal):
+        # A negative normal means the far edge (pos + length) is on the face
+        size = self.tile_size
+        if normal > 0:
+            return round(pos / size) * size
+        return round((pos + length) / size) * size - length
+
+    def sweep_axis(self, pos, length, d, cross, cross_length, cross_d, vertical):
+        if not d:
+            return 1.0, None
+        size = self.tile_size
+        step = 1 if d > 0 else -1
+        edge = pos + length if d > 0 else pos
+        cell = math.ceil(edge / size) if d > 0 else math.floor(edge / size) - 1
+        while True:
+            # Distance the leading edge travels before it touches `cell`
+            s = cell * size - edge if d > 0 else (cell + 1) * size - edge
+            if (s >= d) if d > 0 else (s <= d):
+                return 1.0, None
+            t = s / d
+            low = cross + cross_d * t
+            for other in range(math.floor(low / size), math.ceil((low + cross_length) / size)):
+                if self.is_solid(other, cell) if vertical else self.is_solid(cell, other):
+                    return t, ((0, -step) if vertical else (-step, 0))
+            cell += step
+
+    def sweep_boxes(self, pos, size, delta):
+        """Vectorized sweep() for N square boxes of one size.
+
+        pos and delta are (N, 2) arrays; returns the time of impact of
+        each box as an array, 1.0 where its path is clear.
+        """
+        t = np.ones(len(pos))
+        for axis in (0, 1):
+            hit = self.sweep_axis_many(pos[:, axis], delta[:, axis], pos[:, 1 - axis], delta[:, 1 - axis], size,
+                                       axis == 1)
+            np.minimum(t, hit, out=t)
+        return t
+
+    def sweep_axis_many(self, pos, d, cross, cross_d, length, vertical):
+        size = self.tile_size
+        t = np.ones(len(pos))
+        forward = d > 0
+        moving = d != 0
+        d_safe = np.where(moving, d, 1)
+        edge = np.where(forward, pos + length, pos)
+        first = np.where(forward, np.ceil(edge / size), np.floor(edge / size) - 1)
+        end = edge + d
+        last = np.where(forward, np.ceil(end / size) - 1, np.floor(end / size))
+        step = np.where(forward, 1, -1)
+        count = np.where(moving, np.maximum((last - first) * step + 1, 0), 0).astype(np.int64)
+        rows, cols = self.mask.shape
+        spans = math.ceil(length / size) + 1
+        # One column (or row) of cells per pass, for every box at once
+        for j in range(int(count.max(initial=0))):
+            active = (j < count) & (t == 1)
+            if not active.any():
+                break
+            cell = first + j * step
+            s = np.where(forward, cell * size - edge, (cell + 1) * size - edge)
+            tt = s / d_safe
+            low = cross + cross_d * tt
+            start = np.floor(low / size)
+            stop = np.ceil((low + length) / size)
+            hit = np.zeros(len(pos), dtype=bool)
+            for k in range(spans):
+                other = start + k
+                x, y = (other, cell) if vertical else (cell, other)
+                inside = active & (other < stop) & (x >= 0) & (x < cols) & (y >= 0) & (y < rows)
+                xi = np.where(inside, x, 0).astype(np.int64)
+                yi = np.where(inside, y, 0).astype(np.int64)
+                hit |= inside & self.mask[yi, xi]
+            t[hit] = tt[hit]
+        return t
@@ -0,0 +1,71 @@
+#usr/bin/env python3
+"""dirty rectangle renderer for the game."""
+
+import pygame
+
+
+class DirtyRenderer:
+    """Repaints only the screen regions that changed since the last frame.
+
+    A horizontal camera scroll shifts the previous frame in place and
+    repaints the exposed strip. Everything drawn last frame (sprites,
+    HUD) is erased by repainting the static layer under it, then all
+    sprites are drawn again and only those rects are presented with
+    pygame.display.update. Vertical scrolls, large jumps and frames with
+    too many rects fall back to a full repaint.
+    """
+
+    def __init__(self, game, max_rects=64):
+        self.game = game
+        self.max_rects = max_rects
+        self.scroll = None
+        self.previous = []
+
+    def invalidate(self):
+        # Forces the next frame to be a full repaint
+        self.scroll = None
+
+    def restore(self, rect):
+        screen = self.game.screen
+        screen.set_clip(rect)
+        self.game.draw_static()
+        screen.set_clip(None)
+
+    def render(self):
+        game = self.game
+        screen = game.screen
+        width, height = screen.get_size()
+        scroll = (game.camera.scroll[0], game.camera.scroll[1])
+
+        full = self.scroll is None or scroll[1] != self.scroll[1] or abs(scroll[0] - self.scroll[0]) >= width
+        dirty = []
+        if full:
+            screen.fill((0, 0, 0))
+            game.draw_static()
+        else:
+            dx = int(scroll[0] - self.scroll[0])
+            if dx:
+                screen.scroll(-dx, 0)
+                strip = pygame.Rect(width - dx, 0, dx, height) if dx > 0 else pygame.Rect(0, 0, -dx, height)
+                self.restore(strip)
+                dirty.append(strip)
+            for rect in self.previous:
+                rect = rect.move(-dx, 0)
+                self.restore(rect)
+                dirty.append(rect)
+        self.scroll = scroll
+        game.profiler.lap('tiles')
+
+        drawn = [rect for rect in game.draw_entities() if rect]
+        game.profiler.lap('entities')
+
+        drawn.extend(rect for rect in game.draw_ui() if rect)
+        game.profiler.lap('ui')
+
+        self.previous = drawn
+        dirty.extend(drawn)
+        if full or len(dirty) > self.max_rects:
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty)
+        game.profiler.lap('flip')
@@ -3,120 +3,337 @@
 
 import pygame
 import math
-from scripts.bullet import Projectile
+import numpy as np
+from scripts.bullet import ProjectilePool
+from scripts.assets import assets
+from scripts.animation import clip_for
+
+STATES = ('idle', 'attack', 'death')
+IDLE, ATTACK, DEATH = range(len(STATES))
+
+
+class EnemyManager:
+    """Enemy state for a whole level, stored as contiguous NumPy arrays.
+
+    Detection, facing, cooldowns, shooting decisions and animation
+    timers are computed for every enemy in one vectorized step. The
+    Enemy objects in `enemies` are thin views onto these arrays.
+
+    update() and render() take an optional world-space region; enemies
+    outside it sleep (their timers freeze and they do no AI) or are not
+    drawn. Sleeping goes by the logical size, drawing by the sprite's.
+    """
+
+    COLUMNS = (
+        ('pos', np.float64, (2,)),
+        ('size', np.int64, ()),
+        ('health', np.int64, ()),
+        ('time_since_last_attack', np.float64, ()),
+        ('attack_cooldown', np.float64, ()),
+        ('detect_range', np.float64, ()),
+        ('facing_right', bool, ()),
+        ('state', np.int8, ()),
+        ('frame', np.int64, ()),
+        ('animation_time', np.float64, ()),
+        ('animation_speed', np.float64, ()),
+        ('is_dead', bool, ()),
+        ('death_animation_complete', bool, ()),
+    )
+
+    def __init__(self, player, projectiles=None, capacity=16):
+        self.player = player
+        # A manager without a shared pool owns (and updates) its own
+        self.owns_projectiles = projectiles is None
+        self.projectiles = ProjectilePool() if projectiles is None else projectiles
+        # A LineOfSight; without one, enemies see through walls
+        self.sight = None
+        self.enemies = []
+        self.count = 0
+        self.lengths = np.ones(len(STATES), dtype=np.int64)
+        # Largest frame (w, h); sprites are drawn from pos and can be bigger than `size`
+        self.sprite_size = (0, 0)
+        for name, dtype, shape in self.COLUMNS:
+            setattr(self, name, np.zeros((capacity,) + shape, dtype=dtype))
+
+    def __len__(self):
+        return self.count
+
+    def grow(self):
+        extra = max(len(self.state), 1)
+        for name, dtype, shape in self.COLUMNS:
+            column = getattr(self, name)
+            setattr(self, name, np.concatenate((column, np.zeros((extra,) + shape, dtype=dtype))))
+
+    def add(self, enemy, pos, size):
+        if self.count == len(self.state):
+            self.grow()
+        i = self.count
+        self.pos[i] = pos
+        self.size[i] = size
+        self.health[i] = 2
+        self.time_since_last_attack[i] = 0
+        self.attack_cooldown[i] = 1
+        self.detect_range[i] = 130
+        self.facing_right[i] = True
+        self.state[i] = IDLE
+        self.frame[i] = 0
+        self.animation_time[i] = 0
+        self.animation_speed[i] = 0.1
+        self.is_dead[i] = False
+        self.death_animation_complete[i] = False
+        self.lengths[:] = [enemy.clip.lengths[state] for state in STATES]
+        frames = [frame for frames in enemy.clip.animations.values() for frame in frames]
+        self.sprite_size = (max(frame.get_width() for frame in frames), max(frame.get_height() for frame in frames))
+        self.enemies.append(enemy)
+        self.count += 1
+        return i
+
+    def remove(self, enemy):
+        # Swap-remove: the last enemy takes the freed slot
+        i = enemy.index
+        last = self.count - 1
+        self.detach(enemy)
+        for name, _, _ in self.COLUMNS:
+            column = getattr(self, name)
+            column[i] = column[last]
+        moved = self.enemies.pop()
+        if moved is not enemy:
+            self.enemies[i] = moved
+            moved.index = i
+        self.count -= 1
+
+    def detach(self, enemy):
+        # Points an enemy leaving this manager at a private copy of its row,
+        # so it keeps working as a view; the caller frees the row itself
+        detached = EnemyManager(self.player, self.projectiles, capacity=1)
+        detached.lengths = self.lengths
+        detached.sprite_size = self.sprite_size
+        for name, _, _ in self.COLUMNS:
+            getattr(detached, name)[0] = getattr(self, name)[enemy.index]
+        detached.enemies.append(enemy)
+        detached.count = 1
+        enemy.manager = detached
+        enemy.index = 0
+
+    def set_state(self, i, state):
+        if self.state[i] != state:
+            self.state[i] = state
+            self.frame[i] %= self.lengths[state]
+
+    def take_damage(self, i):
+        self.health[i] -= 1
+        if self.health[i] <= 0:
+            self.is_dead[i] = True
+            self.frame[i] = 0
+            self.set_state(i, DEATH)
+
+    def in_region(self, region, extent=None):
+        # Indices of the enemies overlapping a world-space rect; extent is
+        # the (w, h) tested from each pos, their logical size by default
+        n = self.count
+        x = self.pos[:n, 0]
+        y = self.pos[:n, 1]
+        w = h = self.size[:n]
+        if extent is not None:
+            w, h = extent
+        return np.flatnonzero((x + w > region.left) & (x < region.right) &
+                              (y + h > region.top) & (y < region.bottom))
+
+    def update(self, dt, region=None):
+        if self.count:
+            rows = slice(0, self.count) if region is None else self.in_region(region)
+            self.update_enemies(dt, rows)
+        finished = np.flatnonzero(self.death_animation_complete[:self.count])
+        for i in finished[::-1].tolist():
+            enemy = self.enemies[i]
+            self.remove(enemy)
+            self.projectiles.remove_owner(id(enemy))
+        if self.owns_projectiles and self.projectiles.update(dt, self.player.rect()):
+            self.player.take_damage()
+
+    def update_enemies(self, dt, rows):
+        # rows: a slice or index array of the enemies to step
+        x = self.pos[rows, 0]
+        y = self.pos[rows, 1]
+        state = self.state[rows]
+        frame = self.frame[rows]
+        timer = self.animation_time[rows]
+        speed = self.animation_speed[rows]
+        since_attack = self.time_since_last_attack[rows]
+        facing = self.facing_right[rows]
+        complete = self.death_animation_complete[rows]
+
+        def switch(mask, new_state):
+            changed = mask & (state != new_state)
+            state[changed] = new_state
+            frame[changed] %= self.lengths[new_state]
+
+        # Death animation runs once, on top of the regular animation step
+        dead = self.is_dead[rows]
+        timer[dead] += dt
+        step = dead & (timer >= speed)
+        timer[step] = 0
+        last = frame >= self.lengths[DEATH] - 1
+        frame[step & ~last] += 1
+        complete |= step & last
+
+        since_attack += dt
+        timer += dt
+        step = timer >= speed
+        timer[step] = 0
+        frame[step] = (frame[step] + 1) % self.lengths[state[step]]
+
+        px, py = self.player.pos
+        detected = np.hypot(px - x, py - y) <= self.detect_range[rows]
+        if self.sight is not None and detected.any():
+            # Only the enemies in range need a ray cast
+            half = self.size[rows][detected, None] / 2
+            eyes = np.column_stack((x[detected], y[detected])) + half
+            detected[detected] = self.sight.visible_many(eyes, self.player.rect().center)
+        ahead = px > x
+        facing[detected] = ahead[detected]
+        shooting = (detected & (since_attack >= self.attack_cooldown[rows]) &
+                    ((facing & ahead) | (~facing & (px < x))))
+        back_to_idle = (detected & ~shooting & (state == ATTACK) &
+                        (frame == self.lengths[ATTACK] - 1))
+
+        since_attack[shooting] = 0
+        switch(shooting, ATTACK)
+        switch(~detected | back_to_idle, IDLE)
+
+        # Index arrays gather copies, so write everything back
+        self.state[rows] = state
+        self.frame[rows] = frame
+        self.animation_time[rows] = timer
+        self.time_since_last_attack[rows] = since_attack
+        self.facing_right[rows] = facing
+        self.death_animation_complete[rows] = complete
+        for i in np.arange(self.count)[rows][shooting].tolist():
+            self.enemies[i].shoot()
+
+    def render(self, screen, camera, region=None):
+        # Returns the screen rects drawn
+        if region is None:
+            enemies = self.enemies
+        else:
+            enemies = [self.enemies[i] for i in self.in_region(region, self.sprite_size).tolist()]
+        return [enemy.render(screen, camera) for enemy in enemies]
+
+
+def _column(name):
+    def get(self):
+        return getattr(self.manager, name)[self.index]
+
+    def set(self, value):
+        getattr(self.manager, name)[self.index] = value
+
+    return property(get, set)
+
 
 class Enemy:
-    def __init__(self, pos, player, size=32, sound_manager=None):
+    """One enemy, as a view onto a row of an EnemyManager.
+
+    Enemies created without a manager get a private one, which also owns
+    their projectiles, and update() steps it.
+    """
+
+    ANIMATIONS = {
+        'idle': ("enemy-idle-", 4),
+        'attack': ("enemy-attack-", 4),
+        'death': ("enemy-die-", 4)
+    }
+
+    pos = _column('pos')
+    size = _column('size')
+    health = _column('health')
+    time_since_last_attack = _column('time_since_last_attack')
+    attack_cooldown = _column('attack_cooldown')
+    detect_range = _column('detect_range')
+    current_frame = _column('frame')
+    animation_time = _column('animation_time')
+    animation_speed = _column('animation_speed')
+
+    def __init__(self, pos, player, size=32, sound_manager=None, projectiles=None, manager=None):
         self.sound_manager = sound_manager
-        self.pos = list(pos)
-        self.size = size
-        self.velocity = [0, 0]
         self.player = player
-        self.detect_range = 130
-        self.attack_cooldown = 1
-        self.time_since_last_attack = 0
-        self.projectiles = []
-        self.facing_right = True
-        self.state = 'idle'
-        self.health = 2
-        self.is_dead = False
-        self.death_animation_complete = False
-
+        self.owns_manager = manager is None
+        self.manager = EnemyManager(player, projectiles) if manager is None else manager
         self.load_animations()
-        self.current_frame = 0
-        self.animation_speed = 0.1
-        self.animation_time = 0
+        self.clip = clip_for(self.animations)
+        self.index = self.manager.add(self, pos, size)
+
+    @property
+    def projectiles(self):
+        return self.manager.projectiles
+
+    @property
+    def state(self):
+        return STATES[self.manager.state[self.index]]
+
+    @state.setter
+    def state(self, state):
+        self.manager.set_state(self.index, STATES.index(state))
+
+    @property
+    def facing_right(self):
+        return bool(self.manager.facing_right[self.index])
+
+    @facing_right.setter
+    def facing_right(self, value):
+        self.manager.facing_right[self.index] = value
+
+    @property
+    def is_dead(self):
+        return bool(self.manager.is_dead[self.index])
+
+    @property
+    def death_animation_complete(self):
+        return bool(self.manager.death_animation_complete[self.index])
+
+    @classmethod
+    def asset_paths(cls):
+        return [path for prefix, count in cls.ANIMATIONS.values() for path in assets.frame_paths("enemy_sprites", prefix, count)]
 
     def load_animations(self):
         self.animations = {
-            'idle': self.load_animation_frames("enemy-idle-", 4),
-            'attack': self.load_animation_frames("enemy-attack-", 4),
-            'death': self.load_animation_frames("enemy-die-", 4)
+            state: self.load_animation_frames(prefix, count)
+            for state, (prefix, count) in self.ANIMATIONS.items()
         }
 
     def load_animation_frames(self, prefix, frame_count):
-        return [pygame.image.load(f"enemy_sprites/{prefix}{str(i).zfill(2)}.png").convert_alpha() for i in range(frame_count)]
+        return assets.frames("enemy_sprites", prefix, frame_count)
 
     def rect(self):
-        return pygame.Rect(self.pos[0], self.pos[1], self.size, self.size)
+        x, y = self.manager.pos[self.index]
+        size = self.manager.size[self.index]
+        return pygame.Rect(x, y, size, size)
 
     def update(self, dt):
-        if self.is_dead:
-            self.update_death_animation(dt)
-        if self.state == 'dead':
-            return
-        
-        self.time_since_last_attack += dt
-        self.update_animation(dt)
-
-        if self.detect_player():
-            self.face_player()
-            if self.can_shoot():
-                self.shoot()
-                self.time_since_last_attack = 0
-                self.state = 'attack'
-            elif self.state == 'attack' and self.current_frame == len(self.animations['attack']) - 1:
-                self.state = 'idle'
-        else:
-            self.state = 'idle'
-
-        self.update_projectiles(dt)
-
-    def detect_player(self):
-        distance = math.hypot(self.player.pos[0] - self.pos[0], self.player.pos[1] - self.pos[1])
-        return distance <= self.detect_range
-
-    def face_player(self):
-        self.facing_right = self.player.pos[0] > self.pos[0]
-
-    def can_shoot(self):
-        return (self.time_since_last_attack >= self.attack_cooldown and
-                ((self.facing_right and self.player.pos[0] > self.pos[0]) or
-                 (not self.facing_right and self.player.pos[0] < self.pos[0])))
+        # Enemies in a shared manager are stepped by the manager's owner
+        if self.owns_manager:
+            self.manager.update(dt)
 
     def shoot(self):
         direction = 0 if self.facing_right else math.pi
         speed = 2
-        self.projectiles.append(Projectile(self.pos, direction, speed))
+        self.projectiles.spawn(self.pos, direction, speed, owner=id(self))
         if self.sound_manager:
             self.sound_manager.play_sound('enemy_shot')
 
-    def update_projectiles(self, dt):
-        for projectile in self.projectiles[:]:
-            projectile.update(dt)
-            if projectile.rect().colliderect(self.player.rect()):
-                self.projectiles.remove(projectile)
-                self.player.take_damage()
-
     def take_damage(self):
-        self.health -= 1
-        if self.health <= 0:
-            self.is_dead = True
-            self.current_frame = 0
-            self.state = 'death'
-
-    
-    def update_death_animation(self, dt):
-        self.animation_time += dt
-        if self.animation_time >= self.animation_speed:
-            self.animation_time = 0
-            if self.current_frame < len(self.animations['death']) - 1:
-                self.current_frame += 1
-            else:
-                self.death_animation_complete = True
-
-    def update_animation(self, dt):
-        self.animation_time += dt
-        if self.animation_time >= self.animation_speed:
-            self.animation_time = 0
-            self.current_frame = (self.current_frame + 1) % len(self.animations[self.state])
+        self.manager.take_damage(self.index)
 
     def get_current_sprite(self):
-        frame = self.animations[self.state][self.current_frame]
-        return pygame.transform.flip(frame, not self.facing_right, False)
+        manager = self.manager
+        i = self.index
+        return self.clip.get(STATES[manager.state[i]], manager.frame[i], bool(manager.facing_right[i]))
 
     def render(self, screen, camera):
+        # Returns the screen rect drawn, or None
+        rect = None
         if not self.death_animation_complete:
-            screen.blit(self.get_current_sprite(), (self.pos[0] - camera.scroll[0], self.pos[1] - camera.scroll[1]))
-        for projectile in self.projectiles:
-            projectile.render(screen, camera)
+            x, y = self.manager.pos[self.index]
+            rect = screen.blit(self.get_current_sprite(), camera.to_screen(x, y))
+        if self.owns_manager and self.manager.owns_projectiles:
+            self.projectiles.render(screen, camera)
+        return rect
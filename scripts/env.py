@@ -0,0 +1,250 @@
+#usr/bin/env python3
+"""batched game environments for automated play.
+
+GameEnv wraps one headless Game behind reset()/step(). VectorEnv runs N
+of them in worker processes; actions, observations, rewards and done
+flags are exchanged through NumPy arrays in shared memory, so a step
+only sends a short command down each worker's pipe.
+
+An action is (move, jump, duck, attack): move is -1, 0 or 1, the rest
+are 0 or 1. The reward is coins collected plus the change in health.
+
+Observations are one of:
+
+    'state'     float32 vector of STATE_FIELDS
+    'symbolic'  uint8 (channels, rows, cols) tile grid around the player,
+                see capture.symbolic_observation
+    'pixels'    the rendered frame as uint8 (height, width, 3), or
+                (height, width) with grayscale, scaled down to obs_size
+"""
+
+import multiprocessing
+import random
+from multiprocessing import shared_memory
+import numpy as np
+from scripts.capture import SYMBOLS, symbolic_observation
+
+ACTION_SIZE = 4
+STATE_FIELDS = ('x', 'y', 'vx', 'vy', 'health', 'coins', 'on_ground', 'ducking',
+                'enemy_dx', 'enemy_dy')
+
+
+def observation_spec(obs='state', obs_size=None, grayscale=False, view=(20, 15), width=800, height=600):
+    # (shape, dtype) of the observations GameEnv produces with these settings
+    if obs == 'state':
+        return (len(STATE_FIELDS),), np.float32
+    if obs == 'symbolic':
+        return (len(SYMBOLS), view[1], view[0]), np.uint8
+    if obs == 'pixels':
+        width, height = obs_size or (width, height)
+        return ((height, width) if grayscale else (height, width, 3)), np.uint8
+    raise ValueError(f"unknown observation type: {obs}")
+
+
+class GameEnv:
+    """One headless game with a reset/step interface."""
+
+    def __init__(self, max_ticks=3600, dt=1/60, seed=None, obs='state', obs_size=None, grayscale=False,
+                 view=(20, 15), **game_kwargs):
+        self.max_ticks = max_ticks
+        self.dt = dt
+        self.obs = obs
+        self.obs_size = obs_size
+        self.grayscale = grayscale
+        self.view = view
+        self.game_kwargs = game_kwargs
+        shape, dtype = observation_spec(obs, obs_size, grayscale, view,
+                                        game_kwargs.get('width', 800), game_kwargs.get('height', 600))
+        self.symbols = np.zeros(shape, dtype) if obs == 'symbolic' else None
+        self.game = None
+        self.ticks = 0
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        from Game import Game
+        # The level itself is deterministic; seeding keeps anything random
+        # that levels or agents add reproducible per environment
+        if seed is not None:
+            random.seed(seed)
+            np.random.seed(seed)
+        self.game = Game(headless=True, **self.game_kwargs)
+        if self.obs == 'pixels':
+            self.game.enable_capture(self.obs_size, self.grayscale)
+        self.ticks = 0
+        return self.observation()
+
+    def observation(self):
+        if self.obs == 'symbolic':
+            return symbolic_observation(self.game, *self.view, out=self.symbols)
+        if self.obs == 'pixels':
+            self.game.render()
+            return self.game.capture.observe()
+        player = self.game.player
+        manager = self.game.enemy_manager
+        enemy = (0.0, 0.0)
+        if len(manager):
+            offsets = manager.pos[:len(manager)] - player.pos
+            enemy = offsets[np.argmin(np.hypot(offsets[:, 0], offsets[:, 1]))]
+        return np.array([
+            player.pos[0], player.pos[1], player.velocity[0], player.velocity[1],
+            player.health, player.coins, player.on_ground, player.is_ducking,
+            enemy[0], enemy[1],
+        ], dtype=np.float32)
+
+    def apply(self, action):
+        game = self.game
+        player = game.player
+        move, jump, duck, attack = (int(a) for a in action)
+        game.movement = [move < 0, move > 0]
+        if jump:
+            player.jump()
+        if bool(duck) != player.is_ducking:
+            player.duck(bool(duck))
+        if attack:
+            player.attack(game.enemies)
+
+    def step(self, action):
+        # Returns (observation, reward, done)
+        game = self.game
+        health, coins = game.player.health, game.player.coins
+        self.apply(action)
+        game.update(self.dt)
+        self.ticks += 1
+        reward = (game.player.coins - coins) + (game.player.health - health)
+        done = (not game.running or game.player.health <= 0 or self.ticks >= self.max_ticks or
+                game.player.pos[0] >= game.end_x - game.player.size)
+        return self.observation(), reward, done
+
+
+def _worker(pipe, names, shapes, first, count, seed, env_kwargs):
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+    actions, observations, rewards, dones = (
+        np.ndarray(shape, dtype=dtype, buffer=block.buf) for block, (shape, dtype) in zip(blocks, shapes))
+    envs = [GameEnv(seed=None if seed is None else seed + first + i, **env_kwargs) for i in range(count)]
+    rows = range(first, first + count)
+    for row, env in zip(rows, envs):
+        observations[row] = env.observation()
+    pipe.send(True)
+    while True:
+        command, arg = pipe.recv()
+        if command == 'step':
+            for row, env in zip(rows, envs):
+                observation, rewards[row], dones[row] = env.step(actions[row])
+                # Finished games start over; the observation is the new game's
+                if dones[row]:
+                    observation = env.reset()
+                observations[row] = observation
+        elif command == 'reset':
+            for i, (row, env) in enumerate(zip(rows, envs)):
+                observations[row] = env.reset(None if arg is None else arg + first + i)
+            rewards[first:first + count] = 0
+            dones[first:first + count] = False
+        elif command == 'close':
+            break
+        pipe.send(True)
+    del actions, observations, rewards, dones
+    for block in blocks:
+        block.close()
+
+
+class VectorEnv:
+    """N games stepped together by a pool of worker processes.
+
+    Each worker owns a contiguous slice of the games and writes straight
+    into the shared observation, reward and done arrays. The arrays
+    returned by reset() and step() are those shared buffers, so copy
+    them if they must outlive the next step. A game that finishes is
+    reset automatically.
+    """
+
+    def __init__(self, num_envs, workers=None, seed=None, **env_kwargs):
+        self.num_envs = num_envs
+        workers = min(workers or multiprocessing.cpu_count(), num_envs)
+        obs_shape, obs_dtype = observation_spec(**{
+            name: env_kwargs[name] for name in ('obs', 'obs_size', 'grayscale', 'view', 'width', 'height')
+            if name in env_kwargs})
+        specs = (
+            ((num_envs, ACTION_SIZE), np.int8),
+            ((num_envs,) + obs_shape, obs_dtype),
+            ((num_envs,), np.float32),
+            ((num_envs,), bool),
+        )
+        self.blocks = [shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize))
+                       for shape, dtype in specs]
+        self.actions, self.observations, self.rewards, self.dones = (
+            np.ndarray(shape, dtype=dtype, buffer=block.buf) for block, (shape, dtype) in zip(self.blocks, specs))
+        self.actions[:] = 0
+        self.rewards[:] = 0
+        self.dones[:] = False
+
+        # Spawned rather than forked so no SDL state leaks into the workers
+        context = multiprocessing.get_context('spawn')
+        names = [block.name for block in self.blocks]
+        self.pipes = []
+        self.processes = []
+        try:
+            for w in range(workers):
+                first = num_envs * w // workers
+                count = num_envs * (w + 1) // workers - first
+                parent, child = context.Pipe()
+                process = context.Process(target=_worker, args=(child, names, specs, first, count, seed, env_kwargs),
+                                          daemon=True)
+                process.start()
+                # Only the worker holds the child end now, so its exit shows up as EOF
+                child.close()
+                self.pipes.append(parent)
+                self.processes.append(process)
+            self.wait()
+        except BaseException:
+            # A worker that failed to start (a bad map_file, say) takes the rest down with it
+            self.close(force=True)
+            raise
+
+    def wait(self):
+        for pipe in self.pipes:
+            pipe.recv()
+
+    def send(self, command, arg=None):
+        for pipe in self.pipes:
+            pipe.send((command, arg))
+        self.wait()
+
+    def reset(self, seed=None):
+        self.send('reset', seed)
+        return self.observations
+
+    def step(self, actions):
+        # Returns (observations, rewards, dones) for the whole batch
+        self.actions[:] = actions
+        self.send('step')
+        return self.observations, self.rewards, self.dones
+
+    def close(self, force=False):
+        if self.blocks is None:
+            return
+        for pipe, process in zip(self.pipes, self.processes):
+            if not force:
+                try:
+                    pipe.send(('close', None))
+                    continue
+                except OSError:
+                    pass
+            process.terminate()
+        for process in self.processes:
+            process.join()
+        for pipe in self.pipes:
+            pipe.close()
+        self.processes = []
+        self.pipes = []
+        # Drop the views before releasing the shared blocks
+        del self.actions, self.observations, self.rewards, self.dones
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,41 @@
+#usr/bin/env python3
+"""scripted input source for the game."""
+
+import pygame
+
+
+class ScriptedInput:
+    """Feeds pre-recorded events to the game one tick at a time.
+
+    `script` maps a tick number to the list of events delivered on that
+    tick; ticks missing from the script deliver no events.
+    """
+
+    def __init__(self, script=None, length=None):
+        self.script = dict(script or {})
+        if length is None:
+            length = max(self.script) + 1 if self.script else 0
+        self.length = length
+        self.tick = 0
+
+    @classmethod
+    def from_keys(cls, presses, length=None):
+        script = {}
+        for tick, key, down in presses:
+            script.setdefault(tick, []).append(cls.key_event(key, down))
+        return cls(script, length)
+
+    @staticmethod
+    def key_event(key, down=True):
+        return pygame.event.Event(pygame.KEYDOWN if down else pygame.KEYUP, key=key)
+
+    def poll(self):
+        events = self.script.get(self.tick, ())
+        self.tick += 1
+        return events
+
+    def done(self):
+        return self.tick >= self.length
+
+    def reset(self):
+        self.tick = 0
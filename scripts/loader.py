@@ -0,0 +1,38 @@
+#usr/bin/env python3
+"""background asset loader for the game."""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pygame
+
+
+class AssetLoader:
+    """Decodes image files and sound samples on a thread pool.
+
+    Returns futures; converting images to the display format still has
+    to happen on the main thread. The pool is only started on first use,
+    so importing this module has no side effects.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or min(8, os.cpu_count() or 1)
+        self.executor = None
+
+    def submit(self, func, *args):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix='assets')
+        return self.executor.submit(func, *args)
+
+    def image(self, path):
+        return self.submit(pygame.image.load, path)
+
+    def sound(self, path):
+        return self.submit(pygame.mixer.Sound, path)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+loader = AssetLoader()
@@ -3,11 +3,24 @@
 
 import pygame
 from scripts.sound import SoundManager
+from scripts.assets import assets
+from scripts.animation import Animator, clip_for
+from scripts.timestep import scale
 
 class Player:
+    ANIMATIONS = {
+        'idle': ("adventurer-idle-", 2),
+        'walk': ("adventurer-run-", 6),
+        'attack': ("adventurer-attack1-", 5),
+        'duck': ("adventurer-crouch-", 4),
+        'jump': ("adventurer-jump-", 4),
+        'fall': ("adventurer-fall-", 2)
+    }
+
     def __init__(self, pos, size=32, sound_manager=None):
         self.sound_manager = sound_manager
         self.pos = list(pos)
+        self.prev_pos = list(pos)
         self.size = size
         self.velocity = [0, 0]
         self.on_ground = False
@@ -28,22 +41,21 @@ class Player:
         self.max_x = 0  # Maximum x-coordinate (right boundary)
         
         self.load_animations()
-        self.current_frame = 0
         self.animation_speed = 0.08
-        self.animation_time = 0
+        self.animator = Animator(clip_for(self.animations), self.determine_animation_state(), self.animation_speed)
+
+    @classmethod
+    def asset_paths(cls):
+        return [path for prefix, count in cls.ANIMATIONS.values() for path in assets.frame_paths("sprite", prefix, count)]
 
     def load_animations(self):
         self.animations = {
-            'idle': self.load_animation_frames("adventurer-idle-", 2),
-            'walk': self.load_animation_frames("adventurer-run-", 6),
-            'attack': self.load_animation_frames("adventurer-attack1-", 5),
-            'duck': self.load_animation_frames("adventurer-crouch-", 4),
-            'jump': self.load_animation_frames("adventurer-jump-", 4),
-            'fall': self.load_animation_frames("adventurer-fall-", 2)
+            state: self.load_animation_frames(prefix, count)
+            for state, (prefix, count) in self.ANIMATIONS.items()
         }
 
     def load_animation_frames(self, prefix, frame_count):
-        return [pygame.image.load(f"sprite/{prefix}{str(i).zfill(2)}.png").convert_alpha() for i in range(frame_count)]
+        return assets.frames("sprite", prefix, frame_count)
 
     def determine_animation_state(self):
         if self.is_attacking:
@@ -58,28 +70,27 @@ class Player:
             return 'walk'
         return 'idle'
 
+    def sync_animation_state(self):
+        self.animator.play(self.determine_animation_state())
+
     def update_animation(self, dt):
-        self.animation_time += dt
-        if self.animation_time >= self.animation_speed:
-            self.animation_time = 0
-            self.current_frame = (self.current_frame + 1) % len(self.animations[self.determine_animation_state()])
-            
-            if self.is_attacking and self.current_frame == 0:
+        self.sync_animation_state()
+        if self.animator.advance(dt):
+            if self.is_attacking and self.animator.frame == 0:
                 self.is_attacking = False
 
     def get_current_frame_set(self):
-        return self.animations[self.determine_animation_state()]
+        return self.animations[self.animator.state]
 
     def get_current_sprite(self):
-        frame_set = self.get_current_frame_set()
-        self.current_frame = self.current_frame % len(frame_set)
-        frame = frame_set[self.current_frame]
-        return pygame.transform.flip(frame, not self.facing_right, False)
+        return self.animator.sprite(self.facing_right)
 
     def rect(self,n=1):
         return pygame.Rect(self.pos[0], self.pos[1], self.size, self.size*n)
 
-    def player_mov(self, movement=(0, 0), platforms=[], dt=1/60):
+    def player_mov(self, movement=(0, 0), collision_grid=None, dt=1/60):
+        # Velocities are in pixels per 60 Hz tick; k scales them to this step
+        k = scale(dt)
         if not self.is_attacking:
             self.is_walking = movement[0] != 0
             if movement[0] > 0:
@@ -94,20 +105,17 @@ class Player:
             else:
                 self.velocity[0] = movement[0] * 2
                 # Check if the player would move past the min_x or max_x
-                new_x = self.pos[0] + self.velocity[0]
+                new_x = self.pos[0] + self.velocity[0] * k
                 if new_x < self.min_x:
-                    self.pos[0] = self.min_x
+                    new_x = self.min_x
                     self.velocity[0] = 0
                 elif new_x > self.max_x - self.size:
-                    self.pos[0] = self.max_x - self.size
+                    new_x = self.max_x - self.size
                     self.velocity[0] = 0
-                else:
-                    self.pos[0] = new_x
-                self.check_horizontal_collisions(platforms)
+                self.check_horizontal_collisions(collision_grid, new_x - self.pos[0])
 
-            self.velocity[1] = min(5, self.velocity[1] + 0.5)
-            self.pos[1] += self.velocity[1]
-            self.check_vertical_collisions(platforms)
+            self.velocity[1] = min(5, self.velocity[1] + 0.5 * k)
+            self.check_vertical_collisions(collision_grid, self.velocity[1] * k)
 
             if self.jump_buffer > 0:
                 self.jump_buffer -= dt
@@ -128,29 +136,29 @@ class Player:
         if not self.on_ground and self.velocity[1] > 0:
             self.is_jumping = False
 
-    def check_horizontal_collisions(self, platforms):
-        player_rect = self.rect()
-        for platform in platforms:
-            if player_rect.colliderect(platform):
-                if self.velocity[0] > 0:
-                    self.pos[0] = platform.left - self.size
-                elif self.velocity[0] < 0:
-                    self.pos[0] = platform.right
-                self.velocity[0] = 0
+        self.sync_animation_state()
 
-    def check_vertical_collisions(self, platforms):
+    def sweep(self, collision_grid, dx, dy):
+        # Swept move: stops at the first solid tile on the way, so large
+        # steps cannot tunnel through thin platforms; returns the normal hit
+        if collision_grid is None:
+            self.pos[0] += dx
+            self.pos[1] += dy
+            return None
+        self.pos[0], self.pos[1], normal = collision_grid.sweep(self.pos[0], self.pos[1], self.size, self.size, dx, dy)
+        return normal
+
+    def check_horizontal_collisions(self, collision_grid, dx=0):
+        if self.sweep(collision_grid, dx, 0) is not None:
+            self.velocity[0] = 0
+
+    def check_vertical_collisions(self, collision_grid, dy=0):
         was_on_ground = self.on_ground
-        self.on_ground = False
-        player_rect = self.rect()
-        for platform in platforms:
-            if player_rect.colliderect(platform):
-                if self.velocity[1] > 0:
-                    self.pos[1] = platform.top - self.size
-                    self.on_ground = True
-                    self.velocity[1] = 0
-                elif self.velocity[1] < 0:
-                    self.pos[1] = platform.bottom
-                self.velocity[1] = 0
+        normal = self.sweep(collision_grid, 0, dy)
+        # Landing on a tile has an upward normal; hitting a ceiling, downward
+        self.on_ground = normal is not None and normal[1] < 0
+        if normal is not None:
+            self.velocity[1] = 0
 
         if was_on_ground and not self.on_ground:
             self.coyote_time = 0.1
@@ -168,7 +176,7 @@ class Player:
     def attack(self, enemies):
         if not self.is_attacking:
             self.is_attacking = True
-            self.current_frame = 0
+            self.animator.restart()
             attack_rect = self.rect().inflate(20, 0)
             for enemy in enemies:
                 if attack_rect.colliderect(enemy.rect()):
@@ -0,0 +1,128 @@
+#usr/bin/env python3
+"""frame profiler for the game."""
+
+import csv
+import json
+import time
+import numpy as np
+
+PHASES = ('events', 'player', 'enemies', 'coins', 'tiles', 'entities', 'scale', 'ui', 'flip')
+
+
+class FrameProfiler:
+    """Times each phase of a frame into a fixed-size ring buffer.
+
+    Call begin_frame(), then lap(phase) at the end of each phase, then
+    end_frame(). Phases that do not run in a frame record zero.
+    """
+
+    def __init__(self, capacity=600, enabled=False, phases=PHASES):
+        self.enabled = enabled
+        self.phases = phases
+        self.columns = {phase: i for i, phase in enumerate(phases)}
+        # One row per frame: a column per phase plus the frame total
+        self.samples = np.zeros((capacity, len(phases) + 1))
+        self.index = 0
+        self.filled = 0
+        self.frame_start = 0
+        self.last = 0
+        self.overlay = False
+        self.overlay_lines = []
+        self.overlay_refresh = 0
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.samples[self.index] = 0
+        self.frame_start = self.last = time.perf_counter()
+
+    def lap(self, phase):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.samples[self.index, self.columns[phase]] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        self.samples[self.index, -1] = time.perf_counter() - self.frame_start
+        self.index = (self.index + 1) % len(self.samples)
+        self.filled = min(self.filled + 1, len(self.samples))
+
+    def recent(self):
+        # Filled rows, oldest first
+        if self.filled < len(self.samples):
+            return self.samples[:self.filled]
+        return np.roll(self.samples, -self.index, axis=0)
+
+    def summary(self):
+        rows = self.recent() * 1000
+        if not len(rows):
+            return {}
+        p50, p95, p99 = np.percentile(rows[:, -1], (50, 95, 99))
+        return {
+            'frames': len(rows),
+            'frame_p50_ms': p50,
+            'frame_p95_ms': p95,
+            'frame_p99_ms': p99,
+            'phase_mean_ms': {phase: rows[:, i].mean() for i, phase in enumerate(self.phases)},
+        }
+
+    def dump(self, filename, startup=None):
+        rows = self.recent() * 1000
+        header = [f"{phase}_ms" for phase in self.phases] + ['frame_ms']
+        if filename.endswith('.csv'):
+            with open(filename, 'w', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow(header)
+                writer.writerows(rows.tolist())
+        else:
+            with open(filename, 'w') as file:
+                json.dump({
+                    'summary': self.summary(),
+                    'startup': startup or {},
+                    'columns': header,
+                    'frames': rows.tolist(),
+                }, file)
+
+    def draw_overlay(self, screen, font):
+        # Returns the screen rects drawn
+        if not (self.enabled and self.overlay):
+            return []
+        # Re-render the text a few times a second rather than every frame
+        now = time.perf_counter()
+        if now >= self.overlay_refresh:
+            self.overlay_refresh = now + 0.25
+            summary = self.summary()
+            lines = []
+            if summary:
+                lines.append(f"p50 {summary['frame_p50_ms']:.2f}  p95 {summary['frame_p95_ms']:.2f}  "
+                             f"p99 {summary['frame_p99_ms']:.2f} ms")
+                lines.extend(f"{phase} {ms:.2f}" for phase, ms in summary['phase_mean_ms'].items())
+            self.overlay_lines = [font.render(line, True, (255, 255, 255), (0, 0, 0)) for line in lines]
+        x = screen.get_width() - 10
+        y = 10
+        rects = []
+        for surface in self.overlay_lines:
+            rects.append(screen.blit(surface, (x - surface.get_width(), y)))
+            y += surface.get_height()
+        return rects
+
+
+class DebugChannel:
+    """Opt-in debug output that prints at most once per `interval` seconds."""
+
+    def __init__(self, name, enabled=False, interval=1.0):
+        self.name = name
+        self.enabled = enabled
+        self.interval = interval
+        self.next_time = 0
+
+    def log(self, message):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if now >= self.next_time:
+            self.next_time = now + self.interval
+            print(f"[{self.name}] {message}")
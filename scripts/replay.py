@@ -0,0 +1,123 @@
+#usr/bin/env python3
+"""input recording and replay for the game.
+
+A replay stores the game settings, the dt of every tick and the action
+key presses and releases delivered on each tick, plus the player's
+final position, health and coins. Playing it back feeds the same events
+through Game.handle_events at the same steps, so a run can be checked
+against the recorded result and timed as a regression test:
+
+    python -m scripts.replay replays/*.json
+"""
+
+import json
+import math
+import sys
+import time
+import pygame
+from scripts.inputs import ScriptedInput
+
+VERSION = 1
+ACTION_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN, pygame.K_SPACE)
+SETTINGS = ('width', 'height', 'map_file', 'start_x', 'end_x', 'activity_margin')
+
+
+def final_state(game):
+    return {
+        'pos': [float(game.player.pos[0]), float(game.player.pos[1])],
+        'health': game.player.health,
+        'coins': game.player.coins,
+    }
+
+
+class Replay:
+    def __init__(self, settings, dts, events, final=None):
+        self.settings = settings
+        self.dts = dts
+        # tick -> [[key, down], ...]
+        self.events = events
+        self.final = final
+
+    def __len__(self):
+        return len(self.dts)
+
+    def input(self):
+        return ScriptedInput.from_keys(
+            [(tick, key, down) for tick, presses in self.events.items() for key, down in presses],
+            len(self.dts),
+        )
+
+    def verify(self, game, tolerance=1e-6):
+        # Returns a list of mismatches between the game and the recorded result
+        actual = final_state(game)
+        errors = []
+        if any(not math.isclose(a, b, abs_tol=tolerance) for a, b in zip(actual['pos'], self.final['pos'])):
+            errors.append(f"position {actual['pos']} != {self.final['pos']}")
+        for field in ('health', 'coins'):
+            if actual[field] != self.final[field]:
+                errors.append(f"{field} {actual[field]} != {self.final[field]}")
+        return errors
+
+    def save(self, filename):
+        with open(filename, 'w') as file:
+            json.dump({
+                'version': VERSION,
+                'settings': self.settings,
+                'dts': self.dts,
+                'events': {str(tick): presses for tick, presses in self.events.items()},
+                'final': self.final,
+            }, file)
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename) as file:
+            data = json.load(file)
+        if data.get('version') != VERSION:
+            raise ValueError(f"{filename}: unsupported replay version {data.get('version')}")
+        events = {int(tick): presses for tick, presses in data['events'].items()}
+        return cls(data['settings'], data['dts'], events, data['final'])
+
+
+class InputRecorder:
+    """Records the dt and the action key events of every tick."""
+
+    def __init__(self, game):
+        self.settings = {name: getattr(game, name) for name in SETTINGS}
+        self.dts = []
+        self.events = {}
+
+    def record(self, dt, events):
+        presses = [
+            [event.key, event.type == pygame.KEYDOWN] for event in events
+            if event.type in (pygame.KEYDOWN, pygame.KEYUP) and event.key in ACTION_KEYS
+        ]
+        if presses:
+            self.events[len(self.dts)] = presses
+        self.dts.append(dt)
+
+    def replay(self, game):
+        return Replay(self.settings, self.dts, self.events, final_state(game))
+
+
+def run(replay, realtime=False):
+    # Plays a replay in a fresh game; returns (game, seconds taken)
+    from Game import Game
+    game = Game(headless=not realtime, **replay.settings)
+    start = time.perf_counter()
+    game.play_replay(replay, realtime)
+    return game, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m scripts.replay [--realtime] REPLAY.json ...")
+    realtime = '--realtime' in sys.argv[1:]
+    failed = False
+    for filename in (arg for arg in sys.argv[1:] if arg != '--realtime'):
+        replay = Replay.load(filename)
+        game, elapsed = run(replay, realtime)
+        errors = replay.verify(game)
+        failed |= bool(errors)
+        status = "FAIL " + "; ".join(errors) if errors else "ok"
+        print(f"{filename}: {len(replay)} ticks in {elapsed * 1000:.1f} ms ({status})")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,72 @@
+#usr/bin/env python3
+"""line of sight over the collision grid."""
+
+import numpy as np
+
+UNKNOWN = -1
+
+
+class LineOfSight:
+    """Answers "can a point see the target" by stepping through tiles.
+
+    Rays run from tile to tile (the two end tiles themselves are not
+    tested) and are blocked by any solid tile on the way. Results are
+    cached per viewer tile for the target's current tile, so the cache is
+    only refilled when the target moves to another tile or the grid
+    changes; call clear() after editing the grid in place.
+    """
+
+    def __init__(self, grid):
+        self.set_grid(grid)
+
+    def set_grid(self, grid):
+        self.grid = grid
+        self.cache = np.full(grid.mask.shape, UNKNOWN, dtype=np.int8)
+        self.target = None
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.cache.fill(UNKNOWN)
+
+    def tiles(self, points):
+        size = self.grid.tile_size
+        tiles = (np.asarray(points, dtype=np.float64) // size).astype(np.int64)
+        np.clip(tiles[..., 0], 0, self.grid.cols - 1, out=tiles[..., 0])
+        np.clip(tiles[..., 1], 0, self.grid.rows - 1, out=tiles[..., 1])
+        return tiles
+
+    def visible_many(self, points, target):
+        # points: (N, 2) world positions; returns a bool array, one per point
+        starts = self.tiles(points).reshape(-1, 2)
+        end = tuple(self.tiles(target).tolist())
+        if end != self.target:
+            self.target = end
+            self.cache.fill(UNKNOWN)
+        xs, ys = starts[:, 0], starts[:, 1]
+        known = self.cache[ys, xs]
+        missing = known == UNKNOWN
+        if missing.any():
+            traced = self.trace_many(starts[missing], end).astype(np.int8)
+            self.cache[ys[missing], xs[missing]] = traced
+            known[missing] = traced
+        self.misses += int(missing.sum())
+        self.hits += len(known) - int(missing.sum())
+        return known == 1
+
+    def trace_many(self, starts, end):
+        # Walks every ray one step at a time, all rays at once; step k of a
+        # ray n tiles long is its start plus round(k / n) of the offset
+        delta = np.asarray(end) - starts
+        length = np.abs(delta).max(axis=1)
+        span = 2 * np.maximum(length, 1)
+        clear = np.ones(len(starts), dtype=bool)
+        mask = self.grid.mask
+        for k in range(1, int(length.max(initial=0))):
+            active = clear & (k < length)
+            if not active.any():
+                break
+            x = starts[:, 0] + (2 * k * delta[:, 0] + span // 2) // span
+            y = starts[:, 1] + (2 * k * delta[:, 1] + span // 2) // span
+            clear &= ~(active & mask[np.where(active, y, 0), np.where(active, x, 0)])
+        return clear
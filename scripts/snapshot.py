@@ -0,0 +1,248 @@
+#usr/bin/env python3
+"""world state snapshots for the game.
+
+A snapshot is one bytes object holding everything the simulation needs
+to carry on from a tick: the player, camera, remaining coins, enemy
+rows and the projectile pool. Assets and other derived state are not
+included, so restoring never reloads anything.
+
+    header      magic, version, live enemies, known enemies, known coins,
+                projectile capacity, free slots
+    scalars     float64: player, animator, camera and game fields
+    coins       bitmask over the coins the snapshotter knows
+    enemies     order (int32) then one block per EnemyManager column
+    projectiles pos, prev, vel, life, owner, alive, then the free list
+"""
+
+import struct
+import zlib
+from collections import deque
+import numpy as np
+from scripts.enemy import EnemyManager
+
+MAGIC = b'DDSS'
+VERSION = 2
+HEADER = struct.Struct('<4sHIIIII')  # magic, version, live enemies, known enemies, known coins, capacity, free
+
+PLAYER_FLAGS = ('on_ground', 'facing_right', 'is_walking', 'started_moving', 'is_ducking', 'is_attacking',
+                'is_jumping', 'invulnerable')
+PLAYER_COUNTS = ('coins', 'health')
+PLAYER_TIMERS = ('jump_buffer', 'coyote_time', 'ground_buffer', 'invulnerable_timer')
+SCALARS = 6 + len(PLAYER_FLAGS) + len(PLAYER_COUNTS) + len(PLAYER_TIMERS) + 3 + 4 + 3
+POOL_COLUMNS = (('pos', np.float64, (2,)), ('prev', np.float64, (2,)), ('vel', np.float64, (2,)),
+                ('life', np.float64, ()), ('owner', np.int64, ()), ('alive', bool, ()))
+
+
+class Snapshotter:
+    """Saves and restores a game's simulation state as bytes.
+
+    Coins and enemies are recorded against every one the snapshotter
+    knows of: those in the game when it is created, plus any passed to
+    add_coin() and add_enemy() later. A restore can therefore bring back
+    coins that were collected and enemies that were removed since, and
+    drops ones added after the snapshot was taken.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.coins = []
+        self.enemies = []
+        self.coin_ids = {}
+        self.enemy_ids = {}
+        self.states = tuple(game.player.ANIMATIONS)
+        for coin in game.coins:
+            self.add_coin(coin)
+        for enemy in game.enemy_manager.enemies:
+            self.add_enemy(enemy)
+
+    def add_coin(self, coin):
+        self.coin_ids[id(coin)] = len(self.coins)
+        self.coins.append(coin)
+
+    def add_enemy(self, enemy):
+        self.enemy_ids[id(enemy)] = len(self.enemies)
+        self.enemies.append(enemy)
+
+    def save(self):
+        game = self.game
+        player = game.player
+        animator = player.animator
+        manager = game.enemy_manager
+        pool = game.projectiles
+        n = manager.count
+
+        scalars = [*player.pos, *player.prev_pos, *player.velocity]
+        scalars.extend(getattr(player, name) for name in PLAYER_FLAGS + PLAYER_COUNTS + PLAYER_TIMERS)
+        scalars.extend((self.states.index(animator.state), animator.frame, animator.time))
+        scalars.extend((*game.camera.scroll, *game.camera.prev_scroll))
+        scalars.extend((*game.movement, game.running))
+
+        present = np.zeros(len(self.coins), dtype=bool)
+        present[[self.coin_ids[id(coin)] for coin in game.coins]] = True
+        order = np.array([self.enemy_ids[id(enemy)] for enemy in manager.enemies], dtype=np.int32)
+
+        parts = [
+            HEADER.pack(MAGIC, VERSION, n, len(self.enemies), len(self.coins), len(pool.alive), len(pool.free)),
+            np.array(scalars, dtype=np.float64).tobytes(),
+            np.packbits(present).tobytes(),
+            order.tobytes(),
+        ]
+        parts.extend(getattr(manager, name)[:n].tobytes() for name, _, _ in EnemyManager.COLUMNS)
+        parts.extend(getattr(pool, name).tobytes() for name, _, _ in POOL_COLUMNS)
+        parts.append(np.array(pool.free, dtype=np.int64).tobytes())
+        return b''.join(parts)
+
+    def restore(self, data):
+        magic, version, n, enemy_count, coin_count, capacity, free_count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a Dune Dash snapshot")
+        if enemy_count > len(self.enemies) or coin_count > len(self.coins):
+            raise ValueError("snapshot was taken from a different level")
+        game = self.game
+        player = game.player
+        offset = HEADER.size
+
+        def take(dtype, shape):
+            nonlocal offset
+            count = int(np.prod(shape))
+            array = np.frombuffer(data, dtype=dtype, count=count, offset=offset).reshape(shape)
+            offset += array.nbytes
+            return array
+
+        scalars = take(np.float64, (SCALARS,)).tolist()
+        player.pos = scalars[0:2]
+        player.prev_pos = scalars[2:4]
+        player.velocity = scalars[4:6]
+        i = 6
+        for name in PLAYER_FLAGS:
+            setattr(player, name, bool(scalars[i]))
+            i += 1
+        for name in PLAYER_COUNTS:
+            setattr(player, name, int(scalars[i]))
+            i += 1
+        for name in PLAYER_TIMERS:
+            setattr(player, name, scalars[i])
+            i += 1
+        animator = player.animator
+        animator.state = self.states[int(scalars[i])]
+        animator.frame = int(scalars[i + 1])
+        animator.time = scalars[i + 2]
+        game.camera.scroll = scalars[i + 3:i + 5]
+        game.camera.prev_scroll = scalars[i + 5:i + 7]
+        game.movement = [bool(scalars[i + 7]), bool(scalars[i + 8])]
+        game.running = bool(scalars[i + 9])
+
+        present = np.unpackbits(take(np.uint8, ((coin_count + 7) // 8,)), count=coin_count).astype(bool)
+        # Coins added after the snapshot was taken were not there yet
+        present = present.tolist() + [False] * (len(self.coins) - coin_count)
+        coins = game.coins
+        for coin, keep in zip(self.coins, present):
+            if keep and coin not in coins:
+                coins.add(coin, coin.rect)
+            elif not keep and coin in coins:
+                coins.remove(coin)
+
+        manager = game.enemy_manager
+        order = take(np.int32, (n,))
+        while len(manager.state) < n:
+            manager.grow()
+        # Enemies spawned after the snapshot leave, keeping their current state
+        kept = {id(self.enemies[j]) for j in order.tolist()}
+        for enemy in manager.enemies:
+            if id(enemy) not in kept:
+                manager.detach(enemy)
+        # Same list object, so Game.enemies stays in sync
+        manager.enemies[:] = [self.enemies[j] for j in order.tolist()]
+        manager.count = n
+        for j, enemy in enumerate(manager.enemies):
+            enemy.manager = manager
+            enemy.index = j
+        for name, dtype, shape in EnemyManager.COLUMNS:
+            getattr(manager, name)[:n] = take(dtype, (n,) + shape)
+
+        pool = game.projectiles
+        for name, dtype, shape in POOL_COLUMNS:
+            values = take(dtype, (capacity,) + shape)
+            if len(pool.alive) == capacity:
+                getattr(pool, name)[:] = values
+            else:
+                setattr(pool, name, values.copy())
+        pool.free = take(np.int64, (free_count,)).tolist()
+        pool.count = int(pool.alive.sum())
+
+
+def encode_delta(base, data):
+    # XOR against the previous snapshot leaves mostly zero bytes, which
+    # compress to almost nothing; snapshots of another length are stored whole
+    if len(base) != len(data):
+        return b'F' + zlib.compress(data, 1)
+    xor = np.bitwise_xor(np.frombuffer(base, np.uint8), np.frombuffer(data, np.uint8))
+    return b'D' + zlib.compress(xor.tobytes(), 1)
+
+
+def decode_delta(base, delta):
+    raw = zlib.decompress(delta[1:])
+    if delta[:1] == b'F':
+        return raw
+    return np.bitwise_xor(np.frombuffer(base, np.uint8), np.frombuffer(raw, np.uint8)).tobytes()
+
+
+class SnapshotRing:
+    """The last `capacity` snapshots, delta-encoded, for rewinding.
+
+    Every `keyframe_interval`-th entry is stored whole and the rest as
+    deltas from the entry before, so fetching one decodes at most that
+    many deltas. The oldest entry is always kept whole.
+    """
+
+    def __init__(self, capacity=600, keyframe_interval=30):
+        self.capacity = capacity
+        self.keyframe_interval = keyframe_interval
+        self.entries = deque()
+        self.last = None
+        self.since_keyframe = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def push(self, data):
+        if len(self.entries) == self.capacity:
+            oldest = self.entries.popleft()[1]
+            if self.entries and not self.entries[0][0]:
+                self.entries[0] = (True, decode_delta(oldest, self.entries[0][1]))
+        if self.last is None or self.since_keyframe >= self.keyframe_interval - 1:
+            self.entries.append((True, data))
+            self.since_keyframe = 0
+        else:
+            self.entries.append((False, encode_delta(self.last, data)))
+            self.since_keyframe += 1
+        self.last = data
+
+    def get(self, back=0):
+        # The snapshot pushed `back` pushes before the newest one
+        index = len(self.entries) - 1 - back
+        if not 0 <= index < len(self.entries):
+            raise IndexError("rewind beyond the recorded history")
+        start = index
+        while not self.entries[start][0]:
+            start -= 1
+        data = self.entries[start][1]
+        for j in range(start + 1, index + 1):
+            data = decode_delta(data, self.entries[j][1])
+        return data
+
+    def rewind(self, steps=1):
+        # Drops the newest `steps` snapshots and returns the oldest of them
+        data = self.get(steps - 1)
+        for _ in range(steps):
+            self.entries.pop()
+        self.last = self.get() if self.entries else None
+        self.since_keyframe = 0
+        for is_keyframe, _ in reversed(self.entries):
+            if is_keyframe:
+                break
+            self.since_keyframe += 1
+        return data
+
+    def memory_usage(self):
+        return sum(len(data) for _, data in self.entries)
\ No newline at end of file
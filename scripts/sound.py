@@ -1,29 +1,109 @@
 #usr/bin/env python3
 """Sound manager for the game."""
 
+import time
+from collections import namedtuple
 import pygame
+from scripts.loader import loader
+
+# priority: higher priority voices may cut off lower ones when every
+# channel is busy; max_voices: how many copies may play at once;
+# min_interval: seconds before the same sound can be triggered again;
+# preload: decode in the background at startup rather than on first play
+SoundSpec = namedtuple('SoundSpec', 'path priority max_voices min_interval preload')
 
-pygame.mixer.init()
 
 class SoundManager:
-    def __init__(self):
-        self.sounds = {
-            'jump': pygame.mixer.Sound('sounds/jump.wav'),
-            'crouch': pygame.mixer.Sound('sounds/crouch.wav'),
-            'enemy_shot': pygame.mixer.Sound('sounds/enemy_shot.wav'),
-            'player_shot': pygame.mixer.Sound('sounds/player_shot.wav'),
-            'player_hit': pygame.mixer.Sound('sounds/player_hit.mp3'),
-            'coin_collect': pygame.mixer.Sound('sounds/coin_collect.wav'),
-            'game_over': pygame.mixer.Sound('sounds/game_over.wav')
-        }
+    SOUNDS = {
+        'jump': SoundSpec('sounds/jump.wav', 2, 1, 0.05, True),
+        'crouch': SoundSpec('sounds/crouch.wav', 1, 1, 0.1, True),
+        'enemy_shot': SoundSpec('sounds/enemy_shot.wav', 1, 2, 0.08, True),
+        'player_shot': SoundSpec('sounds/player_shot.wav', 2, 2, 0.05, True),
+        'player_hit': SoundSpec('sounds/player_hit.mp3', 3, 1, 0.1, False),
+        'coin_collect': SoundSpec('sounds/coin_collect.wav', 2, 2, 0.05, True),
+        'game_over': SoundSpec('sounds/game_over.wav', 4, 1, 0, False)
+    }
+
+    def __init__(self, channels=8, frequency=44100, buffer=512):
+        # frequency and buffer only apply if nothing has started the mixer
+        # yet; Game passes them to pygame.mixer.pre_init before pygame.init
+        if not pygame.mixer.get_init():
+            pygame.mixer.init(frequency=frequency, buffer=buffer)
+        pygame.mixer.set_num_channels(channels)
+        self.channels = [pygame.mixer.Channel(i) for i in range(channels)]
+        # (sound name, priority, start time) of the last voice on each channel
+        self.voices = [None] * channels
+        self.last_played = {}
+        self.dropped = 0
+        self.stolen = 0
+        self.pending = {}
+        self.sounds = {}
+        self.preload(name for name, spec in self.SOUNDS.items() if spec.preload)
         self.music = {
             'menu': 'sounds/menu_music.mp3',
             'game': 'sounds/game_music.mp3'
         }
 
+    def preload(self, names):
+        # Decode samples in the background; get_sound() waits for them
+        for name in names:
+            if name not in self.sounds and name not in self.pending:
+                self.pending[name] = loader.sound(self.SOUNDS[name].path)
+
+    def get_sound(self, sound_name):
+        if sound_name not in self.sounds:
+            future = self.pending.pop(sound_name, None)
+            if future is not None:
+                self.sounds[sound_name] = future.result()
+            elif sound_name in self.SOUNDS:
+                self.sounds[sound_name] = pygame.mixer.Sound(self.SOUNDS[sound_name].path)
+        return self.sounds.get(sound_name)
+
+    def pick_channel(self, sound_name, priority):
+        # Returns the index of a channel to play on, or None to drop the sound
+        playing = []
+        free = None
+        for i, channel in enumerate(self.channels):
+            if channel.get_busy():
+                # Channels started outside this manager count as lowest priority
+                playing.append((i, self.voices[i] or (None, 0, 0)))
+            elif free is None:
+                free = i
+        if sum(voice[0] == sound_name for _, voice in playing) >= self.SOUNDS[sound_name].max_voices:
+            return None
+        if free is not None:
+            return free
+        # Every channel is busy: cut off the oldest of the lowest priority voices
+        victim, voice = min(playing, key=lambda item: item[1][1:])
+        if voice[1] > priority:
+            return None
+        self.stolen += 1
+        return victim
+
     def play_sound(self, sound_name):
-        if sound_name in self.sounds:
-            self.sounds[sound_name].play()
+        spec = self.SOUNDS.get(sound_name)
+        if spec is None:
+            return
+        now = time.perf_counter()
+        if now - self.last_played.get(sound_name, float('-inf')) < spec.min_interval:
+            self.dropped += 1
+            return
+        i = self.pick_channel(sound_name, spec.priority)
+        if i is None:
+            self.dropped += 1
+            return
+        self.last_played[sound_name] = now
+        self.channels[i].play(self.get_sound(sound_name))
+        self.voices[i] = (sound_name, spec.priority, now)
+
+    def stats(self):
+        return {
+            'voices': sum(channel.get_busy() for channel in self.channels),
+            'channels': len(self.channels),
+            'dropped': self.dropped,
+            'stolen': self.stolen,
+            'decoded': len(self.sounds),
+        }
 
     def play_music(self, music_name):
         if music_name in self.music:
@@ -0,0 +1,73 @@
+#usr/bin/env python3
+"""spatial hash for the game."""
+
+from collections import defaultdict
+
+
+class SpatialHash:
+    """Items with fixed rects, bucketed by the grid cells they overlap.
+
+    query() only visits the buckets a rect touches, so its cost depends
+    on how crowded that spot is rather than on how many items there are.
+    Items are also kept in a dense list for iteration; remove() moves the
+    last item into the gap, so adding and removing are both O(1).
+    """
+
+    def __init__(self, cell_size=128):
+        self.cell_size = cell_size
+        self.buckets = defaultdict(dict)
+        self.items = []
+        # item -> (index in items, rect)
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __contains__(self, item):
+        return item in self.entries
+
+    def cells(self, rect):
+        size = self.cell_size
+        for cy in range(rect.top // size, (rect.bottom - 1) // size + 1):
+            for cx in range(rect.left // size, (rect.right - 1) // size + 1):
+                yield cx, cy
+
+    def add(self, item, rect):
+        if item in self.entries:
+            return
+        self.entries[item] = (len(self.items), rect)
+        self.items.append(item)
+        for cell in self.cells(rect):
+            self.buckets[cell][item] = rect
+
+    def remove(self, item):
+        index, rect = self.entries.pop(item)
+        last = self.items.pop()
+        if last is not item:
+            self.items[index] = last
+            self.entries[last] = (index, self.entries[last][1])
+        for cell in self.cells(rect):
+            bucket = self.buckets[cell]
+            del bucket[item]
+            if not bucket:
+                del self.buckets[cell]
+
+    def clear(self):
+        self.buckets.clear()
+        self.items.clear()
+        self.entries.clear()
+
+    def query(self, rect):
+        # Items whose rects overlap `rect`, each once
+        found = {}
+        buckets = self.buckets
+        for cell in self.cells(rect):
+            bucket = buckets.get(cell)
+            if bucket:
+                for item, item_rect in bucket.items():
+                    if item_rect.colliderect(rect):
+                        found[item] = None
+        return list(found)
@@ -0,0 +1,101 @@
+#usr/bin/env python3
+"""tile map loading for the game.
+
+Levels are either the original CSV files or a compact binary format: a
+16 byte header followed by one uint16 grid per layer, row-major and
+little-endian. Binary levels are memory-mapped copy-on-write, so loading
+does not copy the tile data.
+
+Coins and enemies are placed by an object layer next to the level,
+`map.objects.csv` for `map.csv` or `map.dmap`, with one `kind,x,y` row
+per object in world pixels.
+
+Convert a CSV level with:
+
+    python -m scripts.tilemap map.csv map.dmap
+"""
+
+import csv
+import os
+import struct
+import sys
+import numpy as np
+
+MAGIC = b'DDMP'
+VERSION = 1
+HEADER = struct.Struct('<4sHHII')  # magic, version, layers, width, height
+TILE_DTYPE = np.dtype('<u2')
+
+
+def load_csv(filename):
+    with open(filename, 'r') as file:
+        rows = [[int(tile or 0) for tile in row] for row in csv.reader(file)]
+    width = max((len(row) for row in rows), default=0)
+    # Rows of the CSV may be ragged; missing cells are empty tiles
+    grid = np.zeros((len(rows), width), dtype=TILE_DTYPE)
+    for y, row in enumerate(rows):
+        grid[y, :len(row)] = row
+    return [grid]
+
+
+def load_binary(filename):
+    with open(filename, 'rb') as file:
+        header = file.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"{filename}: truncated map header")
+    magic, version, layers, width, height = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError(f"{filename}: not a Dune Dash map")
+    if version != VERSION:
+        raise ValueError(f"{filename}: unsupported map version {version}")
+    data = np.memmap(filename, dtype=TILE_DTYPE, mode='c', offset=HEADER.size, shape=(layers, height, width))
+    return [data[i] for i in range(layers)]
+
+
+def save_binary(filename, layers):
+    height, width = layers[0].shape
+    with open(filename, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(layers), width, height))
+        for grid in layers:
+            if grid.shape != (height, width):
+                raise ValueError("all map layers must have the same size")
+            file.write(np.ascontiguousarray(grid, dtype=TILE_DTYPE).tobytes())
+
+
+def is_binary(filename):
+    with open(filename, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def load(filename):
+    # A missing binary level falls back to the CSV next to it
+    if not os.path.exists(filename):
+        fallback = os.path.splitext(filename)[0] + '.csv'
+        if os.path.exists(fallback):
+            filename = fallback
+    if is_binary(filename):
+        return load_binary(filename)
+    return load_csv(filename)
+
+
+def objects_file(filename):
+    return os.path.splitext(filename)[0] + '.objects.csv'
+
+
+def load_objects(filename):
+    # (kind, x, y) for every object of a level; levels without a layer have none
+    path = objects_file(filename)
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', newline='') as file:
+        return [(row['kind'], int(row['x']), int(row['y'])) for row in csv.DictReader(file)]
+
+
+def convert(csv_filename, binary_filename):
+    save_binary(binary_filename, load_csv(csv_filename))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m scripts.tilemap MAP.csv MAP.dmap")
+    convert(sys.argv[1], sys.argv[2])
@@ -0,0 +1,37 @@
+#usr/bin/env python3
+"""fixed timestep clock for the game."""
+
+# Movement constants (speeds, gravity, jump impulse) are per tick and
+# were tuned at this rate; scale() converts a step to multiples of it
+BASE_RATE = 60
+
+
+def scale(dt):
+    return dt * BASE_RATE
+
+
+class FixedTimestep:
+    """Accumulates frame time and hands it out as fixed physics steps.
+
+    Frames longer than `max_frame` are clipped so a stall cannot queue
+    up an unbounded number of steps. After the steps for a frame have
+    run, `alpha` is how far the display is between the last two states.
+    """
+
+    def __init__(self, rate=BASE_RATE, max_frame=0.25):
+        self.rate = rate
+        self.step = 1 / rate
+        self.max_frame = max_frame
+        self.accumulator = 0.0
+
+    def add(self, frame_time):
+        self.accumulator += min(frame_time, self.max_frame)
+
+    def steps(self):
+        while self.accumulator >= self.step:
+            self.accumulator -= self.step
+            yield self.step
+
+    @property
+    def alpha(self):
+        return self.accumulator / self.step
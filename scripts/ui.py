@@ -0,0 +1,46 @@
+#usr/bin/env python3
+"""text rendering helpers for the game."""
+
+from collections import OrderedDict
+
+
+class TextCache:
+    """Small LRU of rendered text surfaces, keyed by font, text and colours."""
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+
+    def render(self, font, text, color, antialias=True, background=None):
+        key = (font, text, antialias, color, background)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        surface = font.render(text, antialias, color, background)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+
+text_cache = TextCache()
+
+
+class Label:
+    """HUD text that is only re-rendered when its value changes."""
+
+    def __init__(self, font, template, color, pos, cache=text_cache):
+        self.font = font
+        self.template = template
+        self.color = color
+        self.pos = pos
+        self.cache = cache
+        self.value = None
+        self.surface = None
+
+    def draw(self, screen, value):
+        if self.surface is None or value != self.value:
+            self.value = value
+            self.surface = self.cache.render(self.font, self.template.format(value), self.color)
+        return screen.blit(self.surface, self.pos)
@@ -0,0 +1,52 @@
+import os
+import sys
+
+import pygame
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from scripts.assets import AssetCache  # noqa: E402
+from scripts.atlas import Atlas, build  # noqa: E402
+from scripts.bullet import ProjectilePool  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def display(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pygame.display.init()
+    pygame.display.set_mode((64, 64))
+
+
+def drawn(image):
+    # The image blitted over a coloured background, as RGB bytes
+    surface = pygame.Surface((20, 20)).convert()
+    surface.fill((40, 120, 200))
+    surface.blit(image, (5, 5))
+    return pygame.image.tobytes(surface, 'RGB')
+
+
+def original_projectile(size):
+    # How the projectile sprite was loaded before the asset cache
+    image = pygame.image.load("projectile.png")
+    image.set_colorkey((255, 255, 255))
+    return pygame.transform.scale(image, (size, size))
+
+
+def test_projectile_matches_original_sprite(monkeypatch):
+    cache = AssetCache()
+    monkeypatch.setattr('scripts.bullet.assets', cache)
+    pool = ProjectilePool()
+    assert drawn(pool.image) == drawn(original_projectile(pool.size))
+
+
+def test_projectile_from_bundle_matches_original_sprite(monkeypatch, tmp_path):
+    bundle = str(tmp_path / "assets.dab")
+    build(bundle, [("projectile.png", (9, 9))])
+    cache = AssetCache()
+    cache.use_bundle(Atlas(bundle))
+    monkeypatch.setattr('scripts.bullet.assets', cache)
+    pool = ProjectilePool(size=9)
+    assert drawn(pool.image) == drawn(original_projectile(9))
@@ -0,0 +1,70 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from scripts.collision import CollisionGrid  # noqa: E402
+
+TILE = 16
+
+
+@pytest.fixture
+def grid():
+    rng = np.random.default_rng(0)
+    tiles = np.where(rng.random((20, 20)) < 0.25, 1, 0)
+    return CollisionGrid(tiles, TILE, {1})
+
+
+def overlaps(grid, x, y, w, h):
+    # Brute force: any solid cell the box covers more than an edge of
+    for cy in range(int(np.floor(y / TILE)), int(np.ceil((y + h) / TILE))):
+        for cx in range(int(np.floor(x / TILE)), int(np.ceil((x + w) / TILE))):
+            if grid.is_solid(cx, cy):
+                return True
+    return False
+
+
+def free_boxes(grid, rng, count):
+    boxes = []
+    while len(boxes) < count:
+        w, h = rng.uniform(4, 40, 2)
+        x, y = rng.uniform(-20, 20 * TILE, 2)
+        if not overlaps(grid, x, y, w, h):
+            boxes.append((x, y, w, h))
+    return boxes
+
+
+def test_sweep_matches_stepping(grid):
+    rng = np.random.default_rng(1)
+    for x, y, w, h in free_boxes(grid, rng, 500):
+        dx, dy = rng.uniform(-80, 80, 2)
+        new_x, new_y, normal = grid.sweep(x, y, w, h, dx, dy)
+        assert not overlaps(grid, new_x, new_y, w, h)
+        if normal is None:
+            t = 1.0
+            assert (new_x, new_y) == pytest.approx((x + dx, y + dy))
+        else:
+            t = (new_x - x) / dx if normal[0] else (new_y - y) / dy
+            # A little further along the path runs into the tile it stopped at
+            assert overlaps(grid, x + dx * (t + 1e-6), y + dy * (t + 1e-6), w, h)
+        # Nothing solid was skipped on the way
+        for f in np.linspace(0, t, 400, endpoint=False):
+            assert not overlaps(grid, x + dx * f, y + dy * f, w, h)
+
+
+def test_sweep_boxes_matches_sweep_axis(grid):
+    rng = np.random.default_rng(2)
+    size = 12
+    pos = rng.uniform(-20, 20 * TILE, (500, 2))
+    delta = rng.uniform(-80, 80, (500, 2))
+    delta[::7, 0] = 0
+    delta[::11, 1] = 0
+    expected = [
+        min(grid.sweep_axis(x, size, dx, y, size, dy, False)[0], grid.sweep_axis(y, size, dy, x, size, dx, True)[0])
+        for (x, y), (dx, dy) in zip(pos.tolist(), delta.tolist())
+    ]
+    np.testing.assert_allclose(grid.sweep_boxes(pos, size, delta), expected)
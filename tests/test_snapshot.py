@@ -0,0 +1,71 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Game import Game  # noqa: E402
+
+
+@pytest.fixture
+def game(monkeypatch):
+    # Assets are loaded relative to the repository root
+    monkeypatch.chdir(ROOT)
+    return Game(headless=True, rewind_ticks=120)
+
+
+def test_spawned_objects_are_snapshotted(game):
+    before = game.save_state()
+    coin = game.spawn('coin', (100, 100))
+    enemy = game.spawn('enemy', (300, 444))
+    game.update(1 / 60)
+    after = game.save_state()
+
+    game.load_state(before)
+    assert coin not in game.coins
+    assert enemy not in game.enemies
+
+    game.load_state(after)
+    assert coin in game.coins
+    assert enemy in game.enemies
+
+
+def test_enemies_dropped_by_a_restore_are_detached(game):
+    before = game.save_state()
+    dropped = game.spawn('enemy', (300, 444))
+    game.load_state(before)
+    spawned = game.spawn('enemy', (500, 444))
+    assert dropped.manager is not game.enemy_manager
+    assert list(dropped.pos) == [300, 444]
+    assert list(spawned.pos) == [500, 444]
+
+
+def test_rewind_past_a_spawn(game):
+    for _ in range(5):
+        game.update(1 / 60)
+    coins, enemies = len(game.coins), len(game.enemies)
+    game.spawn('coin', (100, 100))
+    game.spawn('enemy', (300, 444))
+    for _ in range(5):
+        game.update(1 / 60)
+    assert game.rewind(5) == 5
+    # Five updates back is the state just after the spawn, one more is before it
+    assert (len(game.coins), len(game.enemies)) == (coins + 1, enemies + 1)
+    assert game.rewind(1) == 1
+    assert (len(game.coins), len(game.enemies)) == (coins, enemies)
+
+
+def test_rewind_without_history(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    game = Game(headless=True)
+    game.update(1 / 60)
+    assert game.rewind(5) == 0
+
+
+def test_snapshot_from_a_bigger_level_is_rejected(game):
+    other = Game(headless=True)
+    other.spawn('coin', (100, 100))
+    with pytest.raises(ValueError):
+        game.load_state(other.save_state())